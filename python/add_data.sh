@@ -830,13 +830,14 @@ export_to_elasticsearch() {
   LOG "## Create Kibana Space"
   RUN curl  -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/api/spaces/space"  -H "kbn-xsrf: true" -d '{"id": "gsc-cgc","name": "GSC-CGC","description" : "Geological Survey of Canada Private Space","color": "#aabbcc","initials": "G"}'
 
+  # Datasets to export are collected here and loaded by a single
+  # postgres2es.py run once every flag has been checked
+  EXPORT_ARGS=()
+
   LOG "## Load Probabilistic Model Indicators"
   # shellcheck disable=SC2154
   if [[ $loadPsraModels == true ]]; then
-    LOG "Creating PSRA indices in Elasticsearch"
-    RUN python3 psra_postgres2es.py
-    RUN python3 srcLoss_postgres2es.py
-    RUN python3 fsa_postgres2es.py
+    EXPORT_ARGS+=(--group=psra)
 
     LOG "Creating PSRA Kibana Index Patterns"
     RUN curl -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/s/gsc-cgc/api/saved_objects/index-pattern/opendrr_psra_indicators_s" -H "kbn-xsrf: true" -d '{ "attributes": { "title":"opendrr_psra_indicators_s"}}'
@@ -849,18 +850,15 @@ export_to_elasticsearch() {
   # Load Deterministic Model Indicators
   # shellcheck disable=SC2154
   if [[ $loadDsraScenario == true ]]; then
+    EXPORT_ARGS+=(--group=dsra --group=dsra_extents)
     for eqscenario in "${EQSCENARIO_LIST[@]}"; do
-      LOG "Creating Elasticsearch indexes for DSRA"
-      #RUN python3 dsra_postgres2es.py --eqScenario="$eqscenario" --dbview="indicators" --idField="building"
-      RUN python3 dsra_postgres2es.py --eqScenario="$eqscenario"
-      RUN python3 dsraShakemap_postgres2es.py --eqScenario="$eqscenario"
+      EXPORT_ARGS+=(--eqScenario="$eqscenario")
 
       # LOG "Creating DSRA Kibana Index Patterns"
       # Need to develop saved object workflow for automated index patern generation
       # RUN curl -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/s/gsc-cgc/api/saved_objects/index-pattern/opendrr_dsra_${eqscenario}_indicators_s" -H "kbn-xsrf: true" -d "{ 'attributes': { 'title':'opendrr_dsra_${eqscenario}_indicators_s'}}"
       # RUN curl -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/s/gsc-cgc/api/saved_objects/index-pattern/opendrr_dsra_${eqscenario}_indicators_b" -H "kbn-xsrf: true" -d "{ 'attributes': { 'title':'opendrr_dsra_${eqscenario}_indicators_b'}}"
     done
-  RUN python3 dsraExtents_postgres2es.py
   fi
 
   # Load Hazard Threat Views
@@ -878,8 +876,7 @@ export_to_elasticsearch() {
   # Load physical exposure indicators
   # shellcheck disable=SC2154
   if [[ $loadPhysicalExposure == true ]]; then
-    LOG "Creating Elasticsearch indexes for Physical Exposure"
-    RUN python3 exposure_postgres2es.py
+    EXPORT_ARGS+=(--group=exposure)
 
     LOG "Creating Exposure Kibana Index Patterns"
     RUN curl -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/s/gsc-cgc/api/saved_objects/index-pattern/opendrr_nhsl_physical_exposure_indicators_s" -H "kbn-xsrf: true" -d '{ "attributes": { "title":"opendrr_nhsl_physical_exposure_indicators_s"}}'
@@ -900,18 +897,7 @@ export_to_elasticsearch() {
   # Load Social Fabric Views
   # shellcheck disable=SC2154
   if [[ $loadSocialFabric == true ]]; then
-    LOG "Creating Elasticsearch indexes for Social Fabric"
-    RUN python3 socialFabric_postgres2es.py --aggregation="sauid" --geometry=geom_poly --sortfield="Sauid"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_1km" --geometry=geom --sortfield="gridid_1"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_1km_uc" --geometry=geom --sortfield="gridid_1"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_5km" --geometry=geom --sortfield="gridid_5"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_5km_uc" --geometry=geom --sortfield="gridid_5"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_10km" --geometry=geom --sortfield="gridid_10"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_10km_uc" --geometry=geom --sortfield="gridid_10"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_25km" --geometry=geom --sortfield="gridid_25"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_25km_uc" --geometry=geom --sortfield="gridid_25"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_50km_uc" --geometry=geom --sortfield="gridid_50"
-    RUN python3 socialFabric_postgres2es.py --aggregation="hexgrid_100km_uc" --geometry=geom --sortfield="gridid_100"
+    EXPORT_ARGS+=(--group=social_fabric)
 
     LOG "Creating Social Fabric Kibana Index Patterns"
     RUN curl -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/s/gsc-cgc/api/saved_objects/index-pattern/opendrr_nhsl_social_fabric_indicators_s" -H "kbn-xsrf: true" -d '{ "attributes": { "title":"opendrr_nhsl_social_fabric_indicators_s"}}'
@@ -925,19 +911,7 @@ export_to_elasticsearch() {
   # Load Hexgrid Geometries
   # shellcheck disable=SC2154
   if [[ $loadHexGrid == true ]]; then
-    LOG "Creating Elasticsearch indexes for Hexgrids"
-    RUN python3 hexgrid_1km_postgres2es.py
-    RUN python3 hexgrid_1km_unclipped_postgres2es.py
-    RUN python3 hexgrid_5km_postgres2es.py
-    RUN python3 hexgrid_5km_unclipped_postgres2es.py
-    RUN python3 hexgrid_10km_postgres2es.py
-    RUN python3 hexgrid_10km_unclipped_postgres2es.py
-    RUN python3 hexgrid_25km_postgres2es.py
-    RUN python3 hexgrid_25km_unclipped_postgres2es.py
-    RUN python3 hexgrid_50km_unclipped_postgres2es.py
-    RUN python3 hexgrid_100km_unclipped_postgres2es.py
-    RUN python3 hexgrid_sauid_postgres2es.py
-    RUN python3 hexgrid_sauid_unclipped_postgres2es.py
+    EXPORT_ARGS+=(--group=hexgrid)
 
     LOG "Creating HexGrid Kibana Index Patterns"
     RUN curl -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/s/gsc-cgc/api/saved_objects/index-pattern/opendrr_hexgrid_1km" -H "kbn-xsrf: true" -d '{ "attributes": { "title":"opendrr_hexgrid_1km"}}'
@@ -953,6 +927,16 @@ export_to_elasticsearch() {
     RUN curl -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/s/gsc-cgc/api/saved_objects/index-pattern/opendrr_sauid_hexgrid" -H "kbn-xsrf: true" -d '{ "attributes": { "title":"opendrr_sauid_hexgrid"}}'
     RUN curl -X POST -H "Content-Type: application/json" "${KIBANA_ENDPOINT}/s/gsc-cgc/api/saved_objects/index-pattern/opendrr_sauid_hexgrid_unclipped" -H "kbn-xsrf: true" -d '{ "attributes": { "title":"opendrr_sauid_hexgrid_unclipped"}}'
   fi
+
+  if [[ ${#EXPORT_ARGS[@]} -gt 0 ]]; then
+    # Building-level indexes can be split by province and territory,
+    # see province_column in config.ini
+    for PT in "${PT_LIST[@]}"; do
+      EXPORT_ARGS+=(--province="$PT")
+    done
+    LOG "Creating Elasticsearch indexes"
+    RUN python3 postgres2es.py "${EXPORT_ARGS[@]}"
+  fi
 }
 
 load_kibana_saved_objects() {
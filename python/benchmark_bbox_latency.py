@@ -0,0 +1,231 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import argparse
+import random
+import statistics
+import time
+
+import datasets
+import utils
+from benchmark_bulk_pipeline import synthesize
+
+"""
+Benchmark bbox query latency on building-level point indexes fed in
+AssetID order (asset) and in spatial order with index.sort on the
+spatialKey geohash ([export] spatial_sort, spatial). Each layout is
+loaded from synthetic documents into a scratch index deleted
+afterwards; with --index, existing indexes (e.g. a building index
+exported before and after turning spatial_sort on) are queried instead.
+Queries are the geo_shape envelope filter pygeoapi sends for
+/items?bbox=, with the request cache off.
+Needs the [es] section of config.ini.
+Run this script with a command like:
+python3 benchmark_bbox_latency.py --features=1000000 --queries=200
+"""
+
+GEOHASH = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def main():
+    args = parse_args()
+    es = utils.ConnectionPool.esClient()
+    if args.index:
+        indexes = args.index
+    else:
+        indexes = load(es, args)
+
+    print(
+        "{:<48}{:>10}{:>10}{:>10}{:>12}".format(
+            "index", "median ms", "p95 ms", "took ms", "hits"
+        )
+    )
+    for index in indexes:
+        report(es, index, args)
+
+    if not args.index and not args.keep:
+        for index in indexes:
+            es.indices.delete(index=index)
+    utils.ConnectionPool.close()
+    return
+
+
+def load(es, args):
+    auth = utils.get_config_params("config.ini")
+    columns, rows = synthesize(args.features, args.columns, None)
+    columns = columns + ["st_x", "st_y"]
+    # Spread the buildings over southern Canada, in no spatial order
+    rows = [
+        row + (-140 + (n * 7919 % 8000) / 100, 42 + (n * 104729 % 1800) / 100)
+        for n, row in enumerate(rows)
+    ]
+    spatialRows = sorted(
+        (row + ("{}/{}".format(geohash(row[-2], row[-1]), row[0]),) for row in rows),
+        key=lambda row: row[-1],
+    )
+
+    indexes = []
+    for layout, layoutColumns, layoutRows in (
+        ("asset", columns, rows),
+        ("spatial", columns + [datasets.SPATIAL_FIELD], spatialRows),
+    ):
+        index = "benchmark_bbox_{}".format(layout)
+        dataset = utils.PostGISPointDataset(
+            None,
+            utils.ESConnection(settings={"mappings": datasets.POINT}),
+            view=index,
+            sqlquerystring="",
+            idField="AssetID",
+        )
+        settings = {
+            "settings": dict(datasets.SETTINGS),
+            "mappings": dataset.geometryMappings(datasets.POINT),
+        }
+        if layout == "spatial":
+            settings["settings"].update(
+                {
+                    "sort.field": "properties." + datasets.SPATIAL_FIELD,
+                    "sort.order": "asc",
+                }
+            )
+            settings["mappings"] = utils.mergeMappings(
+                settings["mappings"], datasets.SPATIAL_MAPPING
+            )
+        if es.indices.exists(index=index):
+            es.indices.delete(index=index)
+        es.indices.create(index=index, body=settings, request_timeout=90)
+
+        start = time.perf_counter()
+        dataset.populateElasticSearchIndex(
+            dataset.esConnection(),
+            dataset.getActions(layoutColumns, layoutRows),
+            auth,
+            index,
+        )
+        es.indices.refresh(index=index, request_timeout=600)
+        print("Loaded {} in {:.1f}s".format(index, time.perf_counter() - start))
+        indexes.append(index)
+    return indexes
+
+
+def report(es, index, args):
+    bounds = es.search(
+        index=index,
+        body={
+            "size": 0,
+            "aggs": {"bounds": {"geo_bounds": {"field": "coordinates"}}},
+        },
+    )["aggregations"]["bounds"]["bounds"]
+    west, north = bounds["top_left"]["lon"], bounds["top_left"]["lat"]
+    east, south = bounds["bottom_right"]["lon"], bounds["bottom_right"]["lat"]
+
+    # Same boxes for every index
+    boxes = random.Random(args.seed)
+    latencies, took, hits = [], [], 0
+    for n in range(args.warmup + args.queries):
+        x = boxes.uniform(west, max(west, east - args.bbox))
+        y = boxes.uniform(south, max(south, north - args.bbox))
+        body = {
+            "size": 10,
+            "track_total_hits": True,
+            "query": {
+                "bool": {
+                    "filter": {
+                        "geo_shape": {
+                            "geometry": {
+                                "shape": {
+                                    "type": "envelope",
+                                    "coordinates": [
+                                        [x, y + args.bbox],
+                                        [x + args.bbox, y],
+                                    ],
+                                },
+                                "relation": "intersects",
+                            }
+                        }
+                    }
+                }
+            },
+        }
+        start = time.perf_counter()
+        response = es.search(index=index, body=body, request_cache=False)
+        if n < args.warmup:
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        took.append(response["took"])
+        hits += response["hits"]["total"]["value"]
+
+    print(
+        "{:<48}{:>10.1f}{:>10.1f}{:>10.1f}{:>12.0f}".format(
+            index,
+            statistics.median(latencies),
+            statistics.quantiles(latencies, n=20)[-1],
+            statistics.mean(took),
+            hits / len(latencies),
+        )
+    )
+    return
+
+
+def geohash(lon, lat, precision=datasets.GEOHASH_PRECISION):
+    # Same cells as PostGIS ST_GeoHash
+    lonRange, latRange = [-180.0, 180.0], [-90.0, 90.0]
+    code, bits, value, even = [], 0, 0, True
+    while len(code) < precision:
+        interval, coordinate = (lonRange, lon) if even else (latRange, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate > middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            code.append(GEOHASH[value])
+            bits, value = 0, 0
+    return "".join(code)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="benchmark bbox query latency")
+    parser.add_argument(
+        "--features", type=int, default=1000000, help="building documents per layout"
+    )
+    parser.add_argument(
+        "--columns", type=int, default=100, help="indicator columns per document"
+    )
+    parser.add_argument(
+        "--index",
+        action="append",
+        default=[],
+        help="existing index to query instead of the synthetic ones, can be repeated",
+    )
+    parser.add_argument(
+        "--queries", type=int, default=200, help="timed bbox queries per index"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=20, help="untimed bbox queries per index"
+    )
+    parser.add_argument(
+        "--bbox", type=float, default=0.5, help="side of the bbox in degrees"
+    )
+    parser.add_argument("--seed", type=int, default=1, help="seed of the bboxes")
+    parser.add_argument(
+        "--keep", action="store_true", help="keep the synthetic indexes"
+    )
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    main()
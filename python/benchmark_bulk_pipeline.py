@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import argparse
+import decimal
+import json
+import time
+
+from elasticsearch.helpers.actions import expand_action
+from elasticsearch.serializer import JSONSerializer
+
+import utils
+
+"""
+Benchmark the CPU cost of turning PostGIS rows into bulk request bodies.
+Compares the former FeatureCollection path (dict -> json.dumps(indent=2)
+-> json.loads -> bulk serializer) with the action generator in utils.py.
+Rows are synthesized, so no PostGIS or Elasticsearch is needed.
+Run this script with a command like:
+python3 benchmark_bulk_pipeline.py --features=100000 --columns=300
+"""
+
+POLYGON = json.dumps(
+    {
+        "type": "MultiPolygon",
+        "coordinates": [
+            [[[-123.1 + i * 1e-4, 49.2 + (i % 7) * 1e-4] for i in range(40)]]
+        ],
+    }
+)
+POINT = '{"type":"Point","coordinates":[-117.58484079,49.58943143]}'
+
+
+def main():
+    args = parse_args()
+    serializer = JSONSerializer()
+
+    cases = [
+        (utils.PostGISdataset, POLYGON, True),
+        (utils.PostGISPointDataset, POINT, True),
+        (utils.PostGISTable, None, False),
+    ]
+    print(
+        "{:<22}{:>14}{:>14}{:>14}".format(
+            "path", "legacy (s)", "actions (s)", "saved (s)"
+        )
+    )
+    for cls, geometry, hasGeometry in cases:
+        dataset = cls(None, None, "benchmark", "")
+        columns, rows = synthesize(args.features, args.columns, geometry)
+        actionColumns, actionRows = columns, rows
+        if cls is utils.PostGISPointDataset:
+            actionColumns, actionRows = point_columns(columns, rows)
+
+        legacy = cpu_time(
+            lambda: bulk_bodies(
+                serializer,
+                gendata(legacy_geojson(cls, columns, rows, hasGeometry), "benchmark"),
+            )
+        )
+        actions = cpu_time(
+            lambda: bulk_bodies(
+                serializer, dataset.getActions(actionColumns, actionRows)
+            )
+        )
+        scale = 100000 / args.features
+        print(
+            "{:<22}{:>14.2f}{:>14.2f}{:>14.2f}".format(
+                cls.__name__,
+                legacy * scale,
+                actions * scale,
+                (legacy - actions) * scale,
+            )
+        )
+    print("CPU seconds per 100k features")
+
+    return
+
+
+def synthesize(features, ncolumns, geometry):
+    columns = ["AssetID", "Sauid"] + ["indicator_{}".format(i) for i in range(ncolumns)]
+    rows = []
+    for n in range(features):
+        row = ["{:08d}-RES3A-W1-PC".format(n), "{:08d}".format(n // 20)]
+        row += [
+            decimal.Decimal("{}.{:06d}".format(i, n % 999983)) for i in range(ncolumns)
+        ]
+        if geometry is not None:
+            row.append(geometry)
+        rows.append(tuple(row))
+    if geometry is not None:
+        columns.append("st_asgeojson")
+    return columns, rows
+
+
+def point_columns(columns, rows):
+    # Point datasets read ST_X/ST_Y numbers instead of the GeoJSON text
+    x, y = json.loads(POINT)["coordinates"]
+    return columns[:-1] + ["st_x", "st_y"], [row[:-1] + (x, y) for row in rows]
+
+
+def legacy_geojson(cls, columns, rows, hasGeometry):
+    # Reproduces the getGeoJson/populateElasticSearchIndex round-trip
+    feature_collection = {"type": "FeatureCollection", "features": []}
+    geomIndex = columns.index("st_asgeojson") if hasGeometry else None
+    for row in rows:
+        feature = {"type": "Feature", "properties": {}}
+        if hasGeometry:
+            feature["geometry"] = json.loads(row[geomIndex])
+        if cls is utils.PostGISPointDataset:
+            feature["coordinates"] = json.loads(row[geomIndex])["coordinates"]
+        for index, column in enumerate(columns):
+            if column != "st_asgeojson":
+                feature["properties"][column] = row[index]
+        feature_collection["features"].append(feature)
+    geojsonobject = json.dumps(
+        feature_collection, indent=2, default=utils.decimal_default
+    )
+    return json.loads(geojsonobject)
+
+
+def gendata(data, view):
+    for item in data["features"]:
+        yield {"_index": view, "_source": item}
+
+
+def bulk_bodies(serializer, actions):
+    # Same serialization the bulk helper applies to every action
+    for action in actions:
+        meta, source = expand_action(action)
+        serializer.dumps(meta)
+        serializer.dumps(source)
+
+
+def cpu_time(func):
+    start = time.process_time()
+    func()
+    return time.process_time() - start
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="benchmark PostGIS to ES bulk path")
+    parser.add_argument(
+        "--features", type=int, default=100000, help="rows per dataset path"
+    )
+    parser.add_argument(
+        "--columns", type=int, default=100, help="indicator columns per row"
+    )
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import argparse
+import time
+
+from elasticsearch.serializer import JSONSerializer
+
+import utils
+from benchmark_bulk_pipeline import bulk_bodies
+
+"""
+Benchmark the PostGIS extraction paths of PostGISdataset on one view:
+keyset pages (SELECT per page), a server-side cursor (stream),
+COPY TO STDOUT (copy) and keyset pages over an UNLOGGED staging table
+(staged, staging time included). Each path builds and serializes the
+bulk request bodies, but nothing is sent to Elasticsearch.
+Needs the [rds] section of config.ini.
+Run this script with a command like:
+python3 benchmark_extraction.py
+    --schema=results_psra_national
+    --table=psra_indicators_b
+    --geometry=geom_point
+    --sortkey=AssetID
+    --rows=200000
+"""
+
+
+def main():
+    args = parse_args()
+    serializer = JSONSerializer()
+
+    source = '"{}"."{}"'.format(args.schema, args.table)
+    if args.rows:
+        source = '(SELECT * FROM {} ORDER BY "{}" LIMIT {}) AS sample'.format(
+            source, args.sortkey, args.rows
+        )
+    sqlquerystring = 'SELECT *, ST_AsGeoJSON("{}") FROM {} {{where}} \
+        ORDER BY "{}" LIMIT {{limit}} OFFSET {{offset}}'.format(
+        args.geometry, source, args.sortkey
+    )
+    whole = sqlquerystring.format(**{"limit": "ALL", "offset": 0, "where": ""})
+
+    with utils.ConnectionPool(), utils.PostGISConnection() as pgConnection:
+        dataset = utils.PostGISdataset(
+            pgConnection,
+            None,
+            view=args.table,
+            sqlquerystring=sqlquerystring,
+            sortkey=args.sortkey,
+        )
+        paths = [
+            ("paged", lambda: pagedActions(dataset, pgConnection)),
+            ("stream", lambda: dataset.streamActions(whole, pgConnection)),
+            ("copy", lambda: dataset.copyActions(whole, pgConnection)),
+            ("staged", lambda: stagedActions(dataset, pgConnection)),
+        ]
+        print("{:<10}{:>12}{:>14}{:>12}".format("path", "seconds", "rows/s", "ms/page"))
+        for name, actions in paths:
+            pgConnection.pgConnection().rollback()
+            dataset.pageSeconds().clear()
+            start = time.perf_counter()
+            rows = counted(actions())
+            bulk_bodies(serializer, rows)
+            seconds = time.perf_counter() - start
+            pages = dataset.pageSeconds()
+            perPage = 1000 * sum(pages) / len(pages) if pages else float("nan")
+            print(
+                "{:<10}{:>12.2f}{:>14.0f}{:>12.1f}".format(
+                    name, seconds, rows.count / seconds, perPage
+                )
+            )
+        dataset.dropStaging(pgConnection)
+
+    return
+
+
+def pagedActions(dataset, pgConnection):
+    dataset.LASTKEY = None
+    sqlquerystring, params = dataset.pageQuery()
+    columns, rows = dataset.fetchPage(sqlquerystring, pgConnection, params)
+    while rows:
+        yield from dataset.getActions(columns, rows)
+        sqlquerystring, params = dataset.pageQuery()
+        columns, rows = dataset.fetchPage(sqlquerystring, pgConnection, params)
+
+
+def stagedActions(dataset, pgConnection):
+    dataset.stage(pgConnection)
+    yield from pagedActions(dataset, pgConnection)
+
+
+class counted:
+    """Iterator wrapper that counts the actions going through it"""
+
+    def __init__(self, actions):
+        self._actions = actions
+        self.count = 0
+
+    def __iter__(self):
+        for action in self._actions:
+            self.count += 1
+            yield action
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="benchmark PostGIS extraction paths")
+    parser.add_argument("--schema", default="results_psra_national")
+    parser.add_argument("--table", default="psra_indicators_b")
+    parser.add_argument("--geometry", default="geom_point")
+    parser.add_argument("--sortkey", default="AssetID")
+    parser.add_argument(
+        "--rows", type=int, default=0, help="first rows of the view only (0 = all)"
+    )
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import argparse
+import json
+import time
+
+import datasets
+import utils
+from benchmark_bulk_pipeline import synthesize
+
+"""
+Benchmark the point_geometry modes of PostGISPointDataset on
+synthetic building-level documents (AssetID, Sauid and indicator
+columns): ingest rate and index size with the point indexed as a
+geo_shape and a geo_point (shape), as a geo_point only with the
+GeoJSON kept in _source (source), or without GeoJSON (none), next to
+the former ST_AsGeoJSON text path (geojson).
+Each mode is loaded into a scratch index that is deleted afterwards.
+Needs the [es] section of config.ini, except with --client, which only
+times building the bulk actions and measures their _source bytes.
+Run this script with a command like:
+python3 benchmark_point_mapping.py --features=500000 --columns=100
+"""
+
+MODES = ["geojson", "shape", "source", "none"]
+
+
+def main():
+    args = parse_args()
+    columns, rows = synthesize(args.features, args.columns, None)
+    columns = columns + ["st_x", "st_y"]
+    # Spread the buildings over southern Canada
+    rows = [
+        row + (-140 + (n * 7919 % 8000) / 100, 42 + (n * 104729 % 1800) / 100)
+        for n, row in enumerate(rows)
+    ]
+    if args.client:
+        client(columns, rows)
+        return
+
+    es = utils.ConnectionPool.esClient()
+    auth = utils.get_config_params("config.ini")
+    print("{:<10}{:>12}{:>14}{:>14}".format("mode", "seconds", "docs/s", "size (MB)"))
+    for mode in MODES:
+        index = "benchmark_points_{}".format(mode)
+        dataset, modeColumns, modeRows = layout(mode, index, columns, rows)
+        if es.indices.exists(index=index):
+            es.indices.delete(index=index)
+        settings = {
+            "settings": dict(datasets.SETTINGS),
+            "mappings": dataset.geometryMappings(datasets.POINT),
+        }
+        es.indices.create(index=index, body=settings, request_timeout=90)
+
+        start = time.perf_counter()
+        dataset.populateElasticSearchIndex(
+            dataset.esConnection(),
+            dataset.getActions(modeColumns, modeRows),
+            auth,
+            index,
+        )
+        es.indices.refresh(index=index, request_timeout=600)
+        seconds = time.perf_counter() - start
+        es.indices.forcemerge(index=index, max_num_segments=1, request_timeout=3600)
+        stats = es.indices.stats(index=index, metric="store")
+        size = stats["indices"][index]["total"]["store"]["size_in_bytes"]
+        print(
+            "{:<10}{:>12.1f}{:>14.0f}{:>14.1f}".format(
+                mode, seconds, len(rows) / seconds, size / 1e6
+            )
+        )
+        es.indices.delete(index=index)
+
+    utils.ConnectionPool.close()
+    return
+
+
+def layout(mode, index, columns, rows):
+    """Dataset, columns and rows as each mode reads them from PostGIS"""
+    esConnection = utils.ESConnection(settings={"mappings": datasets.POINT})
+    if mode == "geojson":
+        dataset = utils.PostGISdataset(
+            None, esConnection, view=index, sqlquerystring="", idField="AssetID"
+        )
+        geojson = [
+            json.dumps({"type": "Point", "coordinates": [row[-2], row[-1]]})
+            for row in rows
+        ]
+        return (
+            dataset,
+            columns[:-2] + ["st_asgeojson"],
+            [row[:-2] + (text,) for row, text in zip(rows, geojson)],
+        )
+    dataset = utils.PostGISPointDataset(
+        None,
+        esConnection,
+        view=index,
+        sqlquerystring="",
+        idField="AssetID",
+        pointGeometry=mode,
+    )
+    return dataset, columns, rows
+
+
+def client(columns, rows):
+    print("{:<10}{:>12}{:>14}{:>16}".format("mode", "seconds", "docs/s", "bytes/doc"))
+    for mode in MODES:
+        dataset, modeColumns, modeRows = layout(mode, "benchmark", columns, rows)
+        start = time.perf_counter()
+        size = sum(
+            len(action["_source"].encode("utf-8"))
+            for action in dataset.getActions(modeColumns, modeRows)
+        )
+        seconds = time.perf_counter() - start
+        print(
+            "{:<10}{:>12.2f}{:>14.0f}{:>16.0f}".format(
+                mode, seconds, len(rows) / seconds, size / len(rows)
+            )
+        )
+    return
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="benchmark point geometry mappings")
+    parser.add_argument(
+        "--features", type=int, default=500000, help="building documents per mode"
+    )
+    parser.add_argument(
+        "--columns", type=int, default=100, help="indicator columns per document"
+    )
+    parser.add_argument(
+        "--client",
+        action="store_true",
+        help="only build the bulk actions, without Elasticsearch",
+    )
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    main()
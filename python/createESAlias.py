@@ -29,7 +29,10 @@ es = Elasticsearch(
     http_auth=(auth.get("es", "es_un"), auth.get("es", "es_pw")),
 )
 
-indexList = es.cat.indices(index="*_v1.4.0", h="index", s="index:desc").split()
+version = auth.get("es", "version")
+indexList = es.cat.indices(
+    index="*_{}".format(version), h="index", s="index:desc"
+).split()
 
 for index in indexList:
     # print(index)
@@ -37,3 +40,17 @@ for index in indexList:
     indexBaseName = index.rsplit("_", 1)[0] + "test_alias"
     # print(index.split("_")[0:-1].join())
     es.indices.put_alias(index=index, name=indexBaseName)
+
+# Indexes loaded with alias_swap, and the scenarios of combined DSRA
+# indexes, are served under versioned aliases: their test aliases point
+# at the same indexes with the same filter
+aliasList = es.cat.aliases(name="*_{}".format(version), h="alias").split()
+for alias in dict.fromkeys(aliasList):
+    aliasBaseName = alias.rsplit("_", 1)[0] + "test_alias"
+    for index, body in es.indices.get_alias(name=alias).items():
+        aliasFilter = body["aliases"][alias].get("filter")
+        es.indices.put_alias(
+            index=index,
+            name=aliasBaseName,
+            body={"filter": aliasFilter} if aliasFilter else None,
+        )
@@ -0,0 +1,652 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import export_scheduler
+import utils
+
+"""
+Registry of every PostGIS view exported to ElasticSearch.
+Each entry declares its source (schema, table, geometry column),
+how it is paged (sort key) and the index it is loaded into.
+Schema, table and index names may contain {eqScenario} and {version}
+placeholders, filled in by postgres2es.py at run time.
+"""
+
+SETTINGS = {"number_of_shards": 1, "number_of_replicas": 0}
+POLYGON = {"properties": {"geometry": {"type": "geo_shape"}}}
+POINT = {
+    "properties": {
+        "coordinates": {"type": "geo_point"},
+        "geometry": {"type": "geo_shape"},
+    }
+}
+
+# Place name labels of the indicator views, shown with the features but
+# never searched or aggregated on (their uid columns are): with typed
+# mappings they are kept in _source only, see
+# utils.PostGISdataset.typedMappings.
+# Names a view does not have are ignored.
+DISPLAY_ONLY = ["prname", "ername", "cdname", "csdname"]
+
+# Simplification tolerances (degrees, EPSG:4326) of the polygon layers
+# in the geometry tier, see Dataset.simplified
+SAUID_TOLERANCE = 0.00005
+CSD_TOLERANCE = 0.0002
+FSA_TOLERANCE = 0.0002
+
+# Keyword field naming the scenario of each document in the combined
+# DSRA indexes ([export] combined_dsra), which are sorted on it
+SCENARIO_FIELD = "eqScenario"
+SCENARIO_MAPPING = {
+    "properties": {"properties": {"properties": {SCENARIO_FIELD: {"type": "keyword"}}}}
+}
+
+# Keyword field holding the geohash of each feature's centroid followed
+# by its sort key, which the documents are fed and index-sorted in when
+# [export] spatial_sort is on, see Dataset.spatialSort
+SPATIAL_FIELD = "spatialKey"
+SPATIAL_MAPPING = {
+    "properties": {"properties": {"properties": {SPATIAL_FIELD: {"type": "keyword"}}}}
+}
+GEOHASH_PRECISION = 10
+
+# Index holding the hexagons of each hexgrid layer, shared by the
+# attribute indexes when [export] shared_hexgrid_geometry is on
+HEXGRID_INDEX = "opendrr_hexgrid_{unclipped}_{version}"
+
+# (resolution in km, clipped to the coastline) for each hexgrid layer
+HEXGRIDS = [
+    (1, True),
+    (1, False),
+    (5, True),
+    (5, False),
+    (10, True),
+    (10, False),
+    (25, True),
+    (25, False),
+    (50, False),
+    (100, False),
+]
+
+
+class Dataset:
+    """Declarative description of one PostGIS view and the
+    ElasticSearch index it is exported to
+    """
+
+    def __init__(
+        self,
+        index,
+        schema,
+        table,
+        geometry=None,
+        sortkey=None,
+        idField=None,
+        mapping=POLYGON,
+        orderby=None,
+        point=False,
+        include=None,
+        exclude=None,
+        displayOnly=None,
+        simplify=None,
+        geometryIndex=None,
+        byProvince=False,
+    ):
+        self._index = index
+        self._schema = schema
+        self._table = table
+        self._geometry = geometry
+        self._sortkey = sortkey
+        self._idField = idField
+        self._mapping = mapping
+        self._orderby = orderby
+        self._point = point
+        self._include = include
+        self._exclude = exclude
+        self._displayOnly = displayOnly
+        self._simplify = simplify
+        self._geometryIndex = geometryIndex
+        self._byProvince = byProvince
+
+    def name(self):
+        return self._index.replace("opendrr_", "", 1).replace("_{version}", "")
+
+    def index(self, **params):
+        return self._index.format(**params).lower()
+
+    def idField(self):
+        return self._idField
+
+    def sharedGeometry(self):
+        """
+        Whether the geometry is left to the shared geometry index, the
+        documents keep only the key to join it back on
+        """
+        auth = utils.get_config_params("config.ini")
+        return self._geometryIndex is not None and auth.getboolean(
+            "export", "shared_hexgrid_geometry", fallback=False
+        )
+
+    def provinceColumn(self):
+        """
+        Column holding the province or territory code (AB, BC...) when the
+        dataset is split into one index per province, None otherwise
+        """
+        auth = utils.get_config_params("config.ini")
+        column = auth.get("export", "province_column", fallback="")
+        if not self._byProvince or not column:
+            return None
+        return column
+
+    def spatialSort(self):
+        """
+        Whether the documents are ordered by SPATIAL_FIELD: [export]
+        spatial_sort is on and the dataset has its own geometry and a
+        unique sort key to break ties between features at one place
+        """
+        auth = utils.get_config_params("config.ini")
+        return (
+            self._geometry is not None
+            and self._sortkey is not None
+            and not self.sharedGeometry()
+            and auth.getboolean("export", "spatial_sort", fallback=False)
+        )
+
+    def sortkey(self):
+        if self.spatialSort():
+            return SPATIAL_FIELD
+        return self._sortkey
+
+    def datasetClass(self):
+        if self._geometry is None or self.sharedGeometry():
+            return utils.PostGISTable
+        if self._point:
+            return utils.PostGISPointDataset
+        return utils.PostGISdataset
+
+    def settings(self, **params):
+        settings = {"settings": dict(SETTINGS)}
+        if self.sharedGeometry():
+            settings["mappings"] = {
+                "_meta": {
+                    "geometry_index": self._geometryIndex.format(**params).lower(),
+                    "geometry_key": self._idField,
+                }
+            }
+        elif self._mapping is not None:
+            settings["mappings"] = self._mapping
+        if self.spatialSort():
+            settings["settings"].update(
+                {"sort.field": "properties." + SPATIAL_FIELD, "sort.order": "asc"}
+            )
+            settings["mappings"] = utils.mergeMappings(
+                settings.get("mappings", {}), SPATIAL_MAPPING
+            )
+        return settings
+
+    def source(self, **params):
+        # Scenario ids were written unquoted in the SQL, so PostgreSQL
+        # folded the schema and table names to lower case
+        params = {k: str(v).lower() for k, v in params.items()}
+        return self._schema.format(**params), self._table.format(**params)
+
+    def tolerance(self):
+        return self._simplify
+
+    def simplified(self):
+        """
+        Whether the geometry goes out simplified: a tolerance is declared
+        and [export] simplify is on. PostGIS keeps the full geometry.
+        """
+        auth = utils.get_config_params("config.ini")
+        return self._simplify is not None and auth.getboolean(
+            "export", "simplify", fallback=False
+        )
+
+    def digits(self):
+        auth = utils.get_config_params("config.ini")
+        return auth.getint("export", "simplify_digits", fallback=6)
+
+    def geometrySQL(self, simplified):
+        if simplified:
+            return 'ST_SimplifyPreserveTopology("{}", {})'.format(
+                self._geometry, self._simplify
+            )
+        return '"{}"'.format(self._geometry)
+
+    def orderKey(self):
+        # Column the pages are ordered by, None when they are not ordered
+        return self.sortkey() or self._orderby
+
+    def sqlquerystring(self, scenarioColumn=False, province=None, **params):
+        schema, table = self.source(**params)
+
+        columns = "*"
+        if self._point:
+            # Numeric coordinates, see utils.PostGISPointDataset
+            columns = '*, ST_X("{0}") AS st_x, ST_Y("{0}") AS st_y'.format(
+                self._geometry
+            )
+        elif self.simplified():
+            columns = "*, ST_AsGeoJSON({}, {}) AS st_asgeojson".format(
+                self.geometrySQL(True), self.digits()
+            )
+        elif self._geometry is not None and not self.sharedGeometry():
+            columns = '*, ST_AsGeoJSON("{}")'.format(self._geometry)
+        if scenarioColumn:
+            columns += ", '{}'::text AS \"{}\"".format(
+                params["eqScenario"].replace("'", "''"), SCENARIO_FIELD
+            )
+        if self.spatialSort():
+            # An empty geohash puts features without geometry first
+            columns += (
+                ", coalesce(ST_GeoHash(ST_Centroid(\"{}\"), {}), '') "
+                '|| \'/\' || "{}"::text AS "{}"'.format(
+                    self._geometry, GEOHASH_PRECISION, self._sortkey, SPATIAL_FIELD
+                )
+            )
+        source = '"{}"."{}"'.format(schema, table)
+        if province is not None:
+            source = '(SELECT * FROM {} WHERE "{}" = \'{}\') AS "{}"'.format(
+                source, self.provinceColumn(), province.replace("'", "''"), table
+            )
+        sqlquerystring = "SELECT {} FROM {}".format(columns, source)
+        if self.spatialSort():
+            # Computed key, wrapped so the {where} of key ranges can use
+            # it; read in one ordered pass (stream or copy extraction)
+            sqlquerystring = 'SELECT * FROM ({}) AS "{}"'.format(sqlquerystring, table)
+        if self._sortkey is not None:
+            sqlquerystring += ' {{where}} ORDER BY "{}"'.format(self.sortkey())
+        elif self._orderby is not None:
+            sqlquerystring += ' ORDER BY "{}"'.format(self._orderby)
+        return sqlquerystring + " LIMIT {limit} OFFSET {offset}"
+
+    def exportJob(self, view, sqlquerystring, settings, **options):
+        fields = {
+            "datasetClass": self.datasetClass(),
+            "sortkey": self.sortkey(),
+            "idField": self._idField,
+            "include": self._include,
+            "exclude": self._exclude,
+            "displayOnly": self._displayOnly,
+        }
+        fields.update(options)
+        return export_scheduler.ExportJob(view, sqlquerystring, settings, **fields)
+
+    def job(self, resume=False, **params):
+        return self.exportJob(
+            self.index(**params),
+            self.sqlquerystring(**params),
+            self.settings(**params),
+            resume=resume,
+        )
+
+    def provinceJob(self, provinces, resume=False, **params):
+        """
+        One index per province or territory, named with its lower-case
+        code before the version, all served by a union alias under the
+        national index name once their rows add up to the national view
+        """
+        index = self._index
+        if "_{version}" in index:
+            index = index.replace("_{version}", "_{province}_{version}")
+        else:
+            index += "_{province}"
+        jobs = [
+            self.exportJob(
+                index.format(province=province, **params).lower(),
+                self.sqlquerystring(province=province, **params),
+                self.settings(**params),
+                resume=resume,
+            )
+            for province in provinces
+        ]
+        return export_scheduler.UnionExportJob(
+            self.index(**params), jobs, self.job(**params)
+        )
+
+    def combinedJob(self, eqScenarios, **params):
+        """
+        One index for every scenario, named without {eqScenario}, with
+        ids prefixed by the scenario and a filtered alias per scenario
+        under its former index name. The same AssetID or Sauid appears in
+        every scenario, so the prefix is what keeps the ids unique: a get
+        by id through an alias needs "<scenario>/<id>", not the plain id.
+        """
+        index = self._index.replace("{eqScenario}_", "").format(**params).lower()
+        settings = self.settings(**params)
+        sortFields = ["properties." + SCENARIO_FIELD]
+        if self.spatialSort():
+            sortFields.append("properties." + SPATIAL_FIELD)
+        settings["settings"].update(
+            {"sort.field": sortFields, "sort.order": ["asc"] * len(sortFields)}
+        )
+        settings["mappings"] = utils.mergeMappings(
+            settings.get("mappings", {}), SCENARIO_MAPPING
+        )
+        include = self._include
+        if include is not None:
+            include = include + [SCENARIO_FIELD]
+        jobs, aliases = [], {}
+        for eqScenario in eqScenarios:
+            jobs.append(
+                self.exportJob(
+                    index,
+                    self.sqlquerystring(
+                        scenarioColumn=True, eqScenario=eqScenario, **params
+                    ),
+                    settings,
+                    include=include,
+                    idPrefix="{}/".format(eqScenario),
+                )
+            )
+            aliases[self.index(eqScenario=eqScenario, **params)] = eqScenario
+        return export_scheduler.CombinedExportJob(
+            jobs, "properties." + SCENARIO_FIELD, aliases
+        )
+
+
+def hexgrids(index, schema, table, geometry="geom", shared=True):
+    """
+    One Dataset per hexgrid layer. In the index and table names {hexgrid}
+    is replaced by 1km, 1km_uc..., {unclipped} by 1km, 1km_unclipped...
+    and {n} by 1, 1_uc... Shared layers can leave their hexagons to the
+    HEXGRID_INDEX of the same layer.
+    """
+    datasets = []
+    for km, clipped in HEXGRIDS:
+        suffix = "" if clipped else "_uc"
+        names = {
+            "{hexgrid}": "{}km{}".format(km, suffix),
+            "{unclipped}": "{}km{}".format(km, "" if clipped else "_unclipped"),
+            "{n}": "{}{}".format(km, suffix),
+        }
+        layerIndex, layerTable = index, table
+        for token, value in names.items():
+            layerIndex = layerIndex.replace(token, value)
+            layerTable = layerTable.replace(token, value)
+        gridid = "gridid_{}".format(km)
+        geometryIndex = None
+        if shared:
+            geometryIndex = HEXGRID_INDEX.replace("{unclipped}", names["{unclipped}"])
+        datasets.append(
+            Dataset(
+                layerIndex,
+                schema,
+                layerTable,
+                geometry=geometry,
+                sortkey=gridid,
+                idField=gridid,
+                geometryIndex=geometryIndex,
+            )
+        )
+    return datasets
+
+
+REGISTRY = {
+    "psra": [
+        Dataset(
+            "opendrr_psra_indicators_b_{version}",
+            "results_psra_national",
+            "psra_indicators_b",
+            geometry="geom_point",
+            sortkey="AssetID",
+            idField="AssetID",
+            mapping=POINT,
+            point=True,
+            byProvince=True,
+            displayOnly=DISPLAY_ONLY,
+        ),
+        Dataset(
+            "opendrr_psra_indicators_s_{version}",
+            "results_psra_national",
+            "psra_indicators_s",
+            geometry="geom_poly",
+            sortkey="Sauid",
+            idField="Sauid",
+            simplify=SAUID_TOLERANCE,
+            displayOnly=DISPLAY_ONLY,
+        ),
+        Dataset(
+            "opendrr_psra_indicators_csd_{version}",
+            "results_psra_national",
+            "psra_indicators_csd",
+            geometry="geom",
+            sortkey="csduid",
+            idField="csduid",
+            simplify=CSD_TOLERANCE,
+            displayOnly=DISPLAY_ONLY,
+        ),
+        Dataset(
+            "opendrr_psra_agg_loss_fsa_{version}",
+            "results_psra_national",
+            "psra_agg_loss_fsa",
+            sortkey="fid",
+            idField="fid",
+            mapping=None,
+        ),
+        Dataset(
+            "opendrr_psra_expected_loss_fsa_{version}",
+            "results_psra_national",
+            "psra_expected_loss_fsa",
+            sortkey="fid",
+            idField="fid",
+            mapping=None,
+        ),
+    ]
+    + hexgrids(
+        "opendrr_psra_indicators_hexgrid_{hexgrid}_{version}",
+        "results_psra_national",
+        "psra_indicators_hexgrid_{hexgrid}",
+    )
+    + [
+        Dataset(
+            "opendrr_psra_canada_agg_loss_{version}",
+            "results_psra_canada",
+            "psra_canada_agg_loss",
+            mapping=None,
+        ),
+        Dataset(
+            "opendrr_psra_canada_expected_loss_{version}",
+            "results_psra_canada",
+            "psra_canada_expected_loss",
+            mapping=None,
+        ),
+        Dataset(
+            "opendrr_psra_canada_expected_loss_500yr_{version}",
+            "results_psra_canada",
+            "psra_canada_expected_loss_500yr",
+            mapping=None,
+        ),
+        Dataset(
+            "opendrr_psra_canada_src_loss_{version}",
+            "results_psra_canada",
+            "psra_canada_src_loss",
+            mapping=None,
+        ),
+        Dataset(
+            "opendrr_psra_src_loss_{version}",
+            "results_psra_national",
+            "psra_src_loss",
+            sortkey="fid",
+            idField="fid",
+            mapping=POINT,
+        ),
+        Dataset(
+            "opendrr_geometry_fsauid_{version}",
+            "boundaries",
+            "Geometry_FSAUID",
+            geometry="geom",
+            sortkey="fid",
+            idField="fid",
+            simplify=FSA_TOLERANCE,
+        ),
+    ],
+    "psra_hazard": [
+        Dataset(
+            "opendrr_psra_hmaps_{version}",
+            "results_psra_national",
+            "psra_hmaps",
+            geometry="geom",
+            orderby="geom",
+        ),
+        Dataset(
+            "opendrr_psra_uhs_{version}",
+            "results_psra_national",
+            "psra_uhs",
+            geometry="geom",
+            orderby="geom",
+            mapping=POINT,
+        ),
+    ],
+    "dsra": [
+        Dataset(
+            "opendrr_dsra_{eqScenario}_indicators_b_{version}",
+            "results_dsra_{eqScenario}",
+            "dsra_{eqScenario}_indicators_b",
+            geometry="geom_point",
+            sortkey="AssetID",
+            idField="AssetID",
+            mapping=POINT,
+            point=True,
+            displayOnly=DISPLAY_ONLY,
+        ),
+        Dataset(
+            "opendrr_dsra_{eqScenario}_indicators_s_{version}",
+            "results_dsra_{eqScenario}",
+            "dsra_{eqScenario}_indicators_s",
+            geometry="geom_poly",
+            sortkey="Sauid",
+            idField="Sauid",
+            simplify=SAUID_TOLERANCE,
+            displayOnly=DISPLAY_ONLY,
+        ),
+        Dataset(
+            "opendrr_dsra_{eqScenario}_indicators_csd_{version}",
+            "results_dsra_{eqScenario}",
+            "dsra_{eqScenario}_indicators_csd",
+            geometry="geom",
+            sortkey="csduid",
+            idField="csduid",
+            simplify=CSD_TOLERANCE,
+            displayOnly=DISPLAY_ONLY,
+        ),
+        Dataset(
+            "opendrr_dsra_{eqScenario}_shakemap_{version}",
+            "results_dsra_{eqScenario}",
+            "dsra_{eqScenario}_shakemap",
+            geometry="geom",
+            sortkey="SiteID",
+            idField="SiteID",
+            mapping=POINT,
+        ),
+    ]
+    + hexgrids(
+        "opendrr_dsra_{eqScenario}_shakemap_hexgrid_{hexgrid}_{version}",
+        "results_dsra_{eqScenario}",
+        "dsra_{eqScenario}_sm_hg_{n}",
+    ),
+    "dsra_extents": [
+        Dataset(
+            "opendrr_shakemap_scenario_extents_{version}",
+            "gmf",
+            "shakemap_scenario_extents",
+            geometry="geom",
+        ),
+    ],
+    "dsra_all_scenarios": [
+        Dataset(
+            "opendrr_dsra_all_scenarios_{aggregation}".format(aggregation=aggregation),
+            "dsra",
+            "dsra_all_scenarios_{}".format(aggregation),
+            geometry="geom",
+            orderby=aggregation,
+        )
+        for aggregation in ["sauid", "csduid", "cduid", "dauid", "eruid"]
+    ],
+    "exposure": [
+        Dataset(
+            "opendrr_nhsl_physical_exposure_indicators_s_{version}",
+            "results_nhsl_physical_exposure",
+            "nhsl_physical_exposure_indicators_s",
+            geometry="geom_poly",
+            sortkey="Sauid",
+            idField="Sauid",
+            simplify=SAUID_TOLERANCE,
+            displayOnly=DISPLAY_ONLY,
+        ),
+        Dataset(
+            "opendrr_nhsl_physical_exposure_indicators_b_{version}",
+            "results_nhsl_physical_exposure",
+            "nhsl_physical_exposure_indicators_b",
+            geometry="geom_point",
+            sortkey="BldgID",
+            idField="BldgID",
+            mapping=POINT,
+            point=True,
+            byProvince=True,
+            displayOnly=DISPLAY_ONLY,
+        ),
+    ]
+    + hexgrids(
+        "opendrr_nhsl_physical_exposure_indicators_hexgrid_{hexgrid}_{version}",
+        "results_nhsl_physical_exposure",
+        "nhsl_physical_exposure_indicators_hexgrid_{hexgrid}",
+    ),
+    "social_fabric": [
+        Dataset(
+            "opendrr_nhsl_social_fabric_indicators_s_{version}",
+            "results_nhsl_social_fabric",
+            "nhsl_social_fabric_indicators_s",
+            geometry="geom_poly",
+            sortkey="Sauid",
+            idField="Sauid",
+            simplify=SAUID_TOLERANCE,
+            displayOnly=DISPLAY_ONLY,
+        ),
+    ]
+    + hexgrids(
+        "opendrr_nhsl_social_fabric_indicators_hexgrid_{hexgrid}_{version}",
+        "results_nhsl_social_fabric",
+        "nhsl_social_fabric_indicators_hexgrid_{hexgrid}",
+    ),
+    "hexgrid": hexgrids(
+        HEXGRID_INDEX,
+        "boundaries",
+        "HexGrid_{unclipped}",
+        shared=False,
+    )
+    + [
+        Dataset(
+            "opendrr_sauid_hexgrid_{version}",
+            "boundaries",
+            "SAUID_HexGrid",
+            geometry="geom",
+            orderby="sauid",
+        ),
+        Dataset(
+            "opendrr_sauid_hexgrid_unclipped_{version}",
+            "boundaries",
+            "SAUID_HexGrid_unclipped",
+            geometry="geom",
+            orderby="sauid",
+        ),
+    ],
+    "sauid": [
+        Dataset(
+            "opendrr_geometry_sauid_{version}",
+            "boundaries",
+            "Geometry_SAUID",
+            geometry="geom",
+            sortkey="OBJECTID",
+            idField="OBJECTID",
+        ),
+    ],
+}
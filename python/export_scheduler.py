@@ -0,0 +1,396 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import psycopg2
+
+import utils
+
+
+class ExportJob:
+    """A PostGIS view waiting to be exported to an ElasticSearch index,
+    described by its index name, paged SQL query and index settings
+    """
+
+    def __init__(
+        self,
+        view,
+        sqlquerystring,
+        settings,
+        datasetClass=utils.PostGISdataset,
+        sortkey=None,
+        idField=None,
+        include=None,
+        exclude=None,
+        displayOnly=None,
+        resume=False,
+        keyRange=None,
+        snapshot=None,
+        index=None,
+        idPrefix="",
+    ):
+        self._view = view
+        self._sqlquerystring = sqlquerystring
+        self._settings = settings
+        self._datasetClass = datasetClass
+        self._sortkey = sortkey
+        self._idField = idField
+        self._include = include
+        self._exclude = exclude
+        self._displayOnly = displayOnly
+        self._resume = resume
+        self._keyRange = keyRange
+        self._snapshot = snapshot
+        self._index = index
+        self._idPrefix = idPrefix
+        self._coordinator = None
+
+    def view(self):
+        return self._view
+
+    def sqlquerystring(self):
+        return self._sqlquerystring
+
+    def dataset(self):
+        return self._datasetClass(
+            utils.PostGISConnection(),
+            utils.ESConnection(settings=self._settings),
+            view=self._view,
+            sqlquerystring=self._sqlquerystring,
+            sortkey=self._sortkey,
+            idField=self._idField,
+            include=self._include,
+            exclude=self._exclude,
+            displayOnly=self._displayOnly,
+            resume=self._resume,
+            keyRange=self._keyRange,
+            snapshot=self._snapshot,
+            index=self._index,
+            idPrefix=self._idPrefix,
+        )
+
+    def part(self, index, snapshot=None, keyRange=None):
+        """This job as one part of an index the scheduler manages"""
+        return ExportJob(
+            self._view,
+            self._sqlquerystring,
+            self._settings,
+            datasetClass=self._datasetClass,
+            sortkey=self._sortkey,
+            idField=self._idField,
+            include=self._include,
+            exclude=self._exclude,
+            displayOnly=self._displayOnly,
+            keyRange=keyRange,
+            snapshot=snapshot,
+            index=index,
+            idPrefix=self._idPrefix,
+        )
+
+    def partitions(self):
+        """
+        Number of sort key ranges the view is exported in, by as many
+        workers. Views without a sort key, incremental and resumed
+        exports are always read in one piece.
+        """
+        auth = utils.get_config_params("config.ini")
+        incremental = auth.getboolean("export", "incremental", fallback=False)
+        if (
+            self._sortkey is None
+            or self._resume
+            or self._index is not None
+            or (incremental and self._idField is not None)
+        ):
+            return 1
+        return auth.getint("export", "partitions", fallback=1)
+
+    def splits(self):
+        return self.partitions() > 1
+
+    def split(self, snapshot):
+        """
+        Set up the index and return one job per sort key range, each
+        reading the view in the given exported snapshot
+        """
+        self._coordinator = self.dataset()
+        try:
+            self._coordinator.initializeElasticSearchIndex(
+                self._coordinator.esConnection(),
+                self._coordinator.auth(),
+                self._coordinator.index(),
+            )
+            bounds = self._coordinator.partitionBounds(snapshot, self.partitions())
+        finally:
+            self._coordinator.pgConnection().close()
+        return [
+            self.part(self._coordinator.index(), snapshot.snapshot(), keyRange)
+            for keyRange in bounds
+        ]
+
+    def finish(self):
+        # Once every range is in: restore the index settings, swap the alias
+        dataset = self._coordinator
+        dataset.finalizeElasticSearchIndex(
+            dataset.esConnection(), dataset.auth(), dataset.index()
+        )
+        if dataset.aliasSwap():
+            with utils.PostGISConnection() as pgConnection:
+                dataset.swapAlias(dataset.esConnection(), pgConnection)
+        return
+
+    def estimateSize(self, pgConnection):
+        """
+        Estimate the bytes the query will return (rows x row width)
+        from the PostgreSQL planner, without running it
+        """
+        sqlquerystring = self.sqlquerystring().format(
+            **{"limit": "ALL", "offset": 0, "where": ""}
+        )
+        cur = pgConnection.pgConnection().cursor()
+        try:
+            cur.execute("EXPLAIN (FORMAT JSON) " + sqlquerystring)
+            plan = cur.fetchone()[0][0]["Plan"]
+        except psycopg2.Error:
+            pgConnection.pgConnection().rollback()
+            return 0
+        return plan["Plan Rows"] * plan["Plan Width"]
+
+    def sourceCount(self, pgConnection):
+        sqlquerystring = self.sqlquerystring().format(
+            **{"limit": "ALL", "offset": 0, "where": ""}
+        )
+        cur = pgConnection.pgConnection().cursor()
+        cur.execute("SELECT count(*) FROM ({}) AS source".format(sqlquerystring))
+        count = cur.fetchone()[0]
+        cur.close()
+        return count
+
+    def run(self):
+        dataset = self.dataset()
+        try:
+            dataset.postgis2es()
+        finally:
+            dataset.pgConnection().close()
+        failed = sum(dataset.failures().values())
+        if failed:
+            raise RuntimeError("{} documents failed to index".format(failed))
+        return self.view()
+
+
+class CombinedExportJob:
+    """Several ExportJobs, one per scenario, loaded side by side into a
+    new timestamped index sorted on the scenario field. The combined
+    name and a filtered alias per scenario, under the name of its former
+    index, are then moved onto it in one call, so the scenarios stay
+    served by the previous index while it loads.
+    """
+
+    def __init__(self, jobs, field, aliases):
+        self._jobs = jobs
+        self._field = field
+        self._aliases = aliases
+        self._coordinator = None
+
+    def view(self):
+        return self._jobs[0].view()
+
+    def estimateSize(self, pgConnection):
+        return sum(job.estimateSize(pgConnection) for job in self._jobs)
+
+    def splits(self):
+        return True
+
+    def split(self, snapshot):
+        index = "{}_{}".format(self.view(), time.strftime("%Y%m%d%H%M%S"))
+        self._coordinator = self._jobs[0].part(index).dataset()
+        try:
+            self._coordinator.initializeElasticSearchIndex(
+                self._coordinator.esConnection(),
+                self._coordinator.auth(),
+                self._coordinator.index(),
+            )
+        finally:
+            self._coordinator.pgConnection().close()
+        return [job.part(index, snapshot.snapshot()) for job in self._jobs]
+
+    def finish(self):
+        dataset = self._coordinator
+        dataset.finalizeElasticSearchIndex(
+            dataset.esConnection(), dataset.auth(), dataset.index()
+        )
+        es = dataset.esConnection().esClient()
+        aliases = {self.view(): None, **self._aliases}
+        actions, previous = [], set()
+        for alias, value in aliases.items():
+            if es.indices.exists_alias(name=alias):
+                # Detach the indexes served before, combined or alias swapped
+                for index in es.indices.get_alias(name=alias):
+                    if index != dataset.index():
+                        actions.append({"remove": {"index": index, "alias": alias}})
+                        previous.add(index)
+            elif es.indices.exists(index=alias):
+                # Former concrete index, replaced in the same call
+                actions.append({"remove_index": {"index": alias}})
+            add = {"index": dataset.index(), "alias": alias}
+            if value is not None:
+                add["filter"] = {"term": {self._field: value}}
+            actions.append({"add": add})
+        es.indices.update_aliases(body={"actions": actions})
+        print("{} serves {}".format(dataset.index(), ", ".join(aliases)))
+
+        if dataset.deleteOldIndex():
+            # Only the indexes no other scenario is still served from
+            for index in previous:
+                if not es.indices.get_alias(index=index)[index]["aliases"]:
+                    es.indices.delete(index=index)
+        return
+
+
+class UnionExportJob:
+    """ExportJobs each loading a part of a view (a province or territory)
+    into an index of its own, served together by a union alias under the
+    name of the whole view once every part is in, and only if the parts
+    hold every row of the whole view
+    """
+
+    def __init__(self, alias, jobs, whole):
+        self._alias = alias
+        self._jobs = jobs
+        self._whole = whole
+
+    def view(self):
+        return self._alias
+
+    def estimateSize(self, pgConnection):
+        return sum(job.estimateSize(pgConnection) for job in self._jobs)
+
+    def splits(self):
+        return True
+
+    def split(self, snapshot):
+        # Each part is a complete export of its own index
+        return list(self._jobs)
+
+    def finish(self):
+        # Rows of no part (a NULL or unlisted province) would be lost
+        with utils.PostGISConnection() as pgConnection:
+            expected = self._whole.sourceCount(pgConnection)
+            loaded = sum(job.sourceCount(pgConnection) for job in self._jobs)
+        if loaded != expected:
+            raise RuntimeError(
+                "the parts hold {} of the {} rows of {}; {} left unchanged".format(
+                    loaded, expected, self._whole.view(), self._alias
+                )
+            )
+        es = utils.ConnectionPool.esClient()
+        indexes = []
+        for job in self._jobs:
+            # Parts loaded with alias_swap are aliases themselves
+            if es.indices.exists_alias(name=job.view()):
+                indexes += list(es.indices.get_alias(name=job.view()))
+            else:
+                indexes.append(job.view())
+        actions = [{"add": {"indices": indexes, "alias": self._alias}}]
+        if es.indices.exists_alias(name=self._alias):
+            for index in es.indices.get_alias(name=self._alias):
+                if index not in indexes:
+                    actions.append({"remove": {"index": index, "alias": self._alias}})
+        elif es.indices.exists(index=self._alias):
+            # National index loaded before the split, replaced in the same call
+            actions.append({"remove_index": {"index": self._alias}})
+        es.indices.update_aliases(body={"actions": actions})
+        print("{} now serves {}".format(self._alias, ", ".join(indexes)))
+        return
+
+
+class ExportScheduler:
+    """Run ExportJobs on a bounded pool of worker processes.
+    Concurrent PostGIS queries and ES bulk requests are limited
+    separately, and the largest views are started first so the
+    total run takes about as long as the longest single job
+    """
+
+    def __init__(self, workers=None, pgConnections=None, esBulk=None):
+        auth = utils.get_config_params("config.ini")
+        self._workers = workers or auth.getint("export", "workers", fallback=4)
+        self._pgConnections = pgConnections or auth.getint(
+            "export", "pg_connections", fallback=4
+        )
+        self._esBulk = esBulk or auth.getint("export", "es_bulk", fallback=4)
+
+    def schedule(self, jobs):
+        with utils.PostGISConnection() as pgConnection:
+            sizes = [job.estimateSize(pgConnection) for job in jobs]
+        order = sorted(range(len(jobs)), key=lambda i: sizes[i], reverse=True)
+        return [jobs[i] for i in order]
+
+    def run(self, jobs):
+        jobs = self.schedule(jobs)
+        # Large views are split into sort key ranges, and combined indexes
+        # into their scenarios, exported side by side and all reading the
+        # snapshot held open here until they are done
+        parts = {}
+        snapshot = None
+        failed = []
+        failedTasks = set()
+        try:
+            if any(job.splits() for job in jobs):
+                snapshot = utils.PostGISSnapshot()
+            tasks = []
+            for job in jobs:
+                if job.splits():
+                    parts[job] = job.split(snapshot)
+                    tasks += parts[job]
+                else:
+                    tasks.append(job)
+            # Workers open their own pool, nothing is left idle in the parent
+            utils.ConnectionPool.close()
+            pgSemaphore = multiprocessing.BoundedSemaphore(self._pgConnections)
+            esSemaphore = multiprocessing.BoundedSemaphore(self._esBulk)
+            with ProcessPoolExecutor(
+                max_workers=self._workers,
+                initializer=initWorker,
+                initargs=(pgSemaphore, esSemaphore),
+            ) as executor:
+                futures = {executor.submit(job.run): job for job in tasks}
+                for future in as_completed(futures):
+                    view = futures[future].view()
+                    try:
+                        future.result()
+                        print("Exported {}".format(view))
+                    except Exception as error:
+                        print("Export of {} failed: {}".format(view, error))
+                        failed.append(view)
+                        failedTasks.add(futures[future])
+        finally:
+            if snapshot is not None:
+                snapshot.close()
+
+        for job, jobParts in parts.items():
+            if failedTasks.intersection(jobParts):
+                failed.append(job.view())
+                continue
+            try:
+                job.finish()
+            except Exception as error:
+                print("Export of {} failed: {}".format(job.view(), error))
+                failed.append(job.view())
+        failed = list(dict.fromkeys(failed))
+        if failed:
+            raise RuntimeError("Export failed for: {}".format(", ".join(failed)))
+        return
+
+
+def initWorker(pgSemaphore, esSemaphore):
+    utils.PostGISdataset.PGSEMAPHORE = pgSemaphore
+    utils.PostGISdataset.ESSEMAPHORE = esSemaphore
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import argparse
+
+import psycopg2
+
+import datasets
+import postgres2es
+import utils
+
+"""
+Report what the geometry tier saves on the polygon layers that declare
+a simplification tolerance in the dataset registry: vertex count and
+GeoJSON bytes per index, at full resolution and after
+ST_SimplifyPreserveTopology with [export] simplify_digits decimals.
+Nothing is exported and the PostGIS geometries are left unchanged.
+Needs the [rds] and [es] sections of config.ini.
+Run this script with a command like:
+python3 geometry_report.py
+    --group=psra
+    --group=dsra
+    --eqScenario=SIM9p0_CascadiaInterfaceBestFault
+"""
+
+
+def main():
+    args = parse_args()
+    config = utils.get_config_params("config.ini")
+    version = config.get("es", "version")
+    groups = args.group
+    if not groups and not args.dataset:
+        groups = list(datasets.REGISTRY)
+
+    checks = []
+    for dataset in postgres2es.select(groups, args.dataset):
+        if dataset.tolerance() is None:
+            continue
+        if "{eqScenario}" in dataset.name():
+            for eqScenario in args.eqScenario:
+                checks.append((dataset, {"version": version, "eqScenario": eqScenario}))
+        else:
+            checks.append((dataset, {"version": version}))
+
+    print(
+        "{:<56}{:>10}{:>10}{:>14}{:>14}{:>12}{:>12}".format(
+            "index",
+            "features",
+            "tolerance",
+            "vertices",
+            "simplified",
+            "MB",
+            "simplified",
+        )
+    )
+    with utils.ConnectionPool(), utils.PostGISConnection() as pgConnection:
+        for dataset, params in checks:
+            report(dataset, params, pgConnection)
+
+    return
+
+
+def report(dataset, params, pgConnection):
+    schema, table = dataset.source(**params)
+    cur = pgConnection.pgConnection().cursor()
+    try:
+        cur.execute(
+            "SELECT count(*), sum(ST_NPoints(full_geom)), "
+            "sum(ST_NPoints(simplified_geom)), "
+            "sum(octet_length(ST_AsGeoJSON(full_geom))), "
+            "sum(octet_length(ST_AsGeoJSON(simplified_geom, %(digits)s))) "
+            'FROM (SELECT {} AS full_geom, {} AS simplified_geom FROM "{}"."{}") '
+            "AS geometries".format(
+                dataset.geometrySQL(False), dataset.geometrySQL(True), schema, table
+            ),
+            {"digits": dataset.digits()},
+        )
+        features, vertices, simplified, size, simplifiedSize = cur.fetchone()
+    except psycopg2.Error as error:
+        pgConnection.pgConnection().rollback()
+        print("{:<56}{}".format(dataset.index(**params), str(error).splitlines()[0]))
+        return
+    finally:
+        cur.close()
+
+    print(
+        "{:<56}{:>10}{:>10}{:>14}{:>14}{:>12.1f}{:>12.1f}".format(
+            dataset.index(**params),
+            features,
+            dataset.tolerance(),
+            vertices or 0,
+            simplified or 0,
+            (size or 0) / 1e6,
+            (simplifiedSize or 0) / 1e6,
+        )
+    )
+    return
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="report the vertices and bytes saved by geometry simplification"
+    )
+    parser.add_argument(
+        "--group",
+        action="append",
+        default=[],
+        choices=list(datasets.REGISTRY),
+        help="dataset group to report on, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        help="single dataset to report on by name, can be repeated",
+    )
+    parser.add_argument(
+        "--eqScenario",
+        action="append",
+        default=[],
+        help="earthquake scenario for the dsra datasets, can be repeated",
+    )
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 
 import argparse
 import configparser
-import decimal
+import itertools
 import json
 import logging
 import os
@@ -73,6 +73,7 @@ def main():
         [auth.get("es", "es_endpoint")],
         http_auth=(auth.get("es", "es_un"), auth.get("es", "es_pw")),
     )
+
     connection = None
     try:
         # Connect to the PostGIS database hosted on RDS
@@ -83,44 +84,34 @@ def main():
             port=auth.get("rds", "postgres_port"),
             database=auth.get("rds", "postgres_db"),
         )
-        # Query the entire view with the geometries in geojson format
-        cur = connection.cursor()
+        # Stream the entire view with the geometries in geojson format
+        # through a server-side cursor, straight into the bulk indexer
+        cur = connection.cursor(name="{}_cursor".format(view))
+        cur.itersize = auth.getint("export", "itersize", fallback=10000)
         cur.execute(sqlquerystring)
-        rows = cur.fetchall()
+        # The index is only replaced once the query has returned rows
+        first = cur.fetchmany(cur.itersize)
+        if not first:
+            logging.error(
+                "{} returned no rows, opendrr_{} left as is".format(view, view)
+            )
+            cur.close()
+            return
         columns = [name[0] for name in cur.description]
-        geomIndex = columns.index("st_asgeojson")
-        feature_collection = {"type": "FeatureCollection", "features": []}
-
-        # Format the table into a geojson format for ES/Kibana consumption
-        for row in rows:
-            if args.idField.lower() == "sauid":
-                feature = {
-                    "type": "Feature",
-                    "geometry": json.loads(row[geomIndex]),
-                    "properties": {},
-                }
-                for index, column in enumerate(columns):
-                    if column != "st_asgeojson":
-                        value = row[index]
-                        feature["properties"][column] = value
-
-            elif args.idField.lower() == "building":
-                coordinates = json.loads(row[geomIndex])["coordinates"]
-                feature = {
-                    "type": "Feature",
-                    "geometry": json.loads(row[geomIndex]),
-                    "coordinates": coordinates,
-                    "properties": {},
-                }
-                for index, column in enumerate(columns):
-                    if column != "st_asgeojson":
-                        value = row[index]
-                        feature["properties"][column] = value
-
-            feature_collection["features"].append(feature)
-        geojsonobject = json.dumps(
-            feature_collection, indent=2, default=decimal_default
+
+        # create index
+        if es.indices.exists("opendrr_" + view):
+            es.indices.delete("opendrr_" + view)
+
+        es.indices.create(index="opendrr_" + view, body=settings, request_timeout=90)
+
+        rows = itertools.chain(first, cur)
+        helpers.bulk(
+            es,
+            gendata(genfeatures(columns, rows, args), "opendrr_" + view, id_field),
+            raise_on_error=False,
         )
+        cur.close()
 
     except (Exception, psycopg2.Error) as error:
         logging.error(error)
@@ -130,31 +121,45 @@ def main():
             # cursor.close()
             connection.close()
 
-    # create index
-    if es.indices.exists("opendrr_" + view):
-        es.indices.delete("opendrr_" + view)
-
-    es.indices.create(index="opendrr_" + view, body=settings, request_timeout=90)
-
-    d = json.loads(geojsonobject)
-
-    helpers.bulk(es, gendata(d, "opendrr_" + view, id_field), raise_on_error=False)
-
     return
 
 
-def gendata(data, view, id_field):
-    for item in data["features"]:
+def genfeatures(columns, rows, args):
+    geomIndex = columns.index("st_asgeojson")
+    for row in rows:
+        # Format the row into a geojson format for ES/Kibana consumption
+        if args.idField.lower() == "sauid":
+            feature = {
+                "type": "Feature",
+                "geometry": json.loads(row[geomIndex]),
+                "properties": {},
+            }
+            for index, column in enumerate(columns):
+                if column != "st_asgeojson":
+                    value = row[index]
+                    feature["properties"][column] = value
+
+        elif args.idField.lower() == "building":
+            coordinates = json.loads(row[geomIndex])["coordinates"]
+            feature = {
+                "type": "Feature",
+                "geometry": json.loads(row[geomIndex]),
+                "coordinates": coordinates,
+                "properties": {},
+            }
+            for index, column in enumerate(columns):
+                if column != "st_asgeojson":
+                    value = row[index]
+                    feature["properties"][column] = value
+
+        yield feature
+
+
+def gendata(features, view, id_field):
+    for item in features:
         yield {"_index": view, "_id": item["properties"][id_field], "_source": item}
 
 
-# Function to handle decimal encoder error
-def decimal_default(obj):
-    if isinstance(obj, decimal.Decimal):
-        return float(obj)
-    raise TypeError
-
-
 def get_config_params(args):
     """
     Parse Input/Output columns from supplied *.ini file
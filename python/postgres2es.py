@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import argparse
+
+import datasets
+import export_scheduler
+import utils
+
+"""
+Export any subset of the dataset registry (datasets.py) from PostGIS
+to ElasticSearch in a single process
+Run this script with a command like:
+python3 postgres2es.py
+    --group=dsra
+    --eqScenario=SIM9p0_CascadiaInterfaceBestFault
+    --group=hexgrid
+    --dataset=geometry_sauid
+"""
+
+
+def main():
+    args = parse_args()
+
+    if args.list:
+        for group, members in datasets.REGISTRY.items():
+            for dataset in members:
+                print("{:<20}{}".format(group, dataset.name()))
+        return
+
+    config = utils.get_config_params("config.ini")
+    version = config.get("es", "version")
+    combined = config.getboolean("export", "combined_dsra", fallback=False)
+    checkpoints = config.getboolean("export", "checkpoints", fallback=False)
+    if args.resume and not checkpoints:
+        raise SystemExit("--resume needs [export] checkpoints = true")
+    extraction = config.get("export", "extraction", fallback="paged")
+    if config.getboolean("export", "spatial_sort", fallback=False):
+        # The computed key cannot be indexed, every keyset page would
+        # hash and sort the whole view again
+        if extraction not in ("stream", "copy"):
+            raise SystemExit("spatial_sort needs [export] extraction = stream or copy")
+    if checkpoints and extraction in ("stream", "copy"):
+        # A single query has no page boundary to record
+        print(
+            "WARNING: checkpoints are only written by paged exports, "
+            "an interrupted stream or copy export starts over with --resume"
+        )
+
+    jobs = []
+    for dataset in select(args.group, args.dataset):
+        if "{eqScenario}" in dataset.name():
+            if combined and args.eqScenario:
+                jobs.append(dataset.combinedJob(args.eqScenario, version=version))
+                continue
+            for eqScenario in args.eqScenario:
+                jobs.append(
+                    dataset.job(
+                        resume=args.resume, version=version, eqScenario=eqScenario
+                    )
+                )
+        elif dataset.provinceColumn() is not None and args.province:
+            jobs.append(
+                dataset.provinceJob(args.province, resume=args.resume, version=version)
+            )
+        else:
+            jobs.append(dataset.job(resume=args.resume, version=version))
+
+    if not jobs:
+        raise SystemExit("No datasets selected, see --list")
+    with utils.ConnectionPool():
+        utils.putIndexTemplate(utils.ConnectionPool.esClient(), config)
+        export_scheduler.ExportScheduler().run(jobs)
+
+    return
+
+
+def select(groups, names):
+    selected = []
+    for group in groups:
+        selected += datasets.REGISTRY[group]
+    byName = {
+        dataset.name(): dataset
+        for members in datasets.REGISTRY.values()
+        for dataset in members
+    }
+    for name in names:
+        if name not in byName:
+            raise SystemExit("Unknown dataset {}, see --list".format(name))
+        selected.append(byName[name])
+    # A dataset requested twice is exported once
+    return list(dict.fromkeys(selected))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="export registered PostGIS views to ElasticSearch"
+    )
+    parser.add_argument(
+        "--group",
+        action="append",
+        default=[],
+        choices=list(datasets.REGISTRY),
+        help="dataset group to export, can be repeated",
+    )
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        help="single dataset to export by name, can be repeated",
+    )
+    parser.add_argument(
+        "--eqScenario",
+        action="append",
+        default=[],
+        help="earthquake scenario for the dsra datasets, can be repeated",
+    )
+    parser.add_argument(
+        "--province",
+        action="append",
+        default=[],
+        help="province or territory code (AB, BC...) to split the "
+        "building-level indexes by, can be repeated",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="list the registered datasets"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue interrupted exports from their checkpoint",
+    )
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    main()
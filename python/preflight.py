@@ -0,0 +1,314 @@
+#!/usr/bin/python3
+# =================================================================
+# SPDX-License-Identifier: MIT
+#
+# Copyright (C) 2020-2021 Government of Canada
+#
+# Main Authors: Drew Rotheram <drew.rotheram-clarke@canada.ca>
+#               Joost van Ulden <joost.vanulden@canada.ca>
+# =================================================================
+
+import argparse
+import math
+
+import psycopg2
+
+import datasets
+import postgres2es
+import utils
+
+"""
+Pre-flight check of the export queries in the dataset registry.
+EXPLAIN (FORMAT JSON) is run on the first page and on a deep page of
+every selected dataset, flagging the sequential scans and sorts each
+page would repeat, with the planner cost of the whole export.
+Sort keys of tables without a btree index are listed, and built
+CONCURRENTLY with --createIndexes. Nothing is exported.
+Needs the [rds] and [es] sections of config.ini.
+Run this script with a command like:
+python3 preflight.py
+    --group=psra
+    --group=dsra
+    --eqScenario=SIM9p0_CascadiaInterfaceBestFault
+    --createIndexes
+"""
+
+
+def main():
+    args = parse_args()
+    config = utils.get_config_params("config.ini")
+    version = config.get("es", "version")
+    groups = args.group
+    if not groups and not args.dataset:
+        groups = list(datasets.REGISTRY)
+
+    checks = []
+    for dataset in postgres2es.select(groups, args.dataset):
+        if "{eqScenario}" in dataset.name():
+            if not args.eqScenario:
+                print("Skipping {}, no --eqScenario given".format(dataset.name()))
+            for eqScenario in args.eqScenario:
+                checks.append((dataset, {"version": version, "eqScenario": eqScenario}))
+        else:
+            checks.append((dataset, {"version": version}))
+
+    print(
+        "{:<64}{:>12}{:>12}{:>12}{:>16}  {}".format(
+            "index", "rows", "first page", "deep page", "total cost", "flags"
+        )
+    )
+    indexes = []
+    with utils.ConnectionPool(), utils.PostGISConnection() as pgConnection:
+        for dataset, params in checks:
+            indexes += preflight(dataset, params, pgConnection)
+
+        if not indexes:
+            print("Every sort key of a table is backed by an index")
+            return
+        print("Missing sort key indexes:")
+        for statement in indexes:
+            print("    {};".format(statement))
+        if args.createIndexes:
+            createIndexes(indexes, pgConnection)
+
+    return
+
+
+def preflight(dataset, params, pgConnection):
+    """
+    Print the plan summary of one dataset and return the CREATE INDEX
+    statements that would let its pages use an index scan
+    """
+    connection = pgConnection.pgConnection()
+    cur = connection.cursor()
+    sqlquerystring = dataset.sqlquerystring(**params)
+    schema, table = dataset.source(**params)
+    key = dataset.orderKey()
+    limit = utils.PostGISdataset.LIMIT
+    notes = set()
+    try:
+        relkind, keyType, indexed = sortKeyIndex(cur, schema, table, key)
+        whole = explain(
+            cur, sqlquerystring.format(**{"limit": "ALL", "offset": 0, "where": ""})
+        )
+        rows = whole["Plan Rows"]
+        if "{where}" in sqlquerystring:
+            # Keyset pages, planned with the predicates the export sends
+            notNull = 'WHERE "{}" IS NOT NULL'.format(key)
+            first = explain(
+                cur,
+                sqlquerystring.format(
+                    **{"limit": limit, "offset": 0, "where": notNull}
+                ),
+            )
+            # Page three quarters into the view, planned but never run
+            lastkey = deepKey(cur, schema, table, key, relkind, indexed)
+            bound, keyParams = "%(lastkey)s", {"lastkey": lastkey}
+            if lastkey is None:
+                # No statistics: the planned page finds its own key, at
+                # the cost of an extra ordered pass
+                notes.add("deep page cost includes finding its key")
+                source = sqlquerystring.format(
+                    **{"limit": "ALL", "offset": 0, "where": notNull}
+                )
+                bound = (
+                    '(SELECT "{0}" FROM ({1}) AS source ORDER BY "{0}" '
+                    "OFFSET {2} LIMIT 1)".format(key, source, int(rows * 3 // 4))
+                )
+                keyParams = None
+            deep = explain(
+                cur,
+                sqlquerystring.format(
+                    **{
+                        "limit": limit,
+                        "offset": 0,
+                        "where": '{} AND "{}" > {}'.format(notNull, key, bound),
+                    }
+                ),
+                keyParams,
+            )
+        else:
+            first = explain(
+                cur, sqlquerystring.format(**{"limit": limit, "offset": 0, "where": ""})
+            )
+            deep = explain(
+                cur,
+                sqlquerystring.format(
+                    **{"limit": limit, "offset": rows // 2, "where": ""}
+                ),
+            )
+    except psycopg2.Error as error:
+        connection.rollback()
+        print("{:<64}{}".format(dataset.index(**params), str(error).splitlines()[0]))
+        return []
+
+    flags = planFlags(first) | planFlags(deep) | notes
+    if key is None:
+        flags.add("pages not ordered")
+    pages = max(1, math.ceil(rows / limit))
+    total = pages * (first["Total Cost"] + deep["Total Cost"]) / 2
+
+    indexes = []
+    if keyType == "geometry":
+        flags.add("ordered by geometry")
+    if key is not None and relkind == "v" and any("sort" in f for f in flags):
+        flags.add("view sorted per page, see [export] staging")
+    if dataset.spatialSort():
+        # The geohash key is computed, read in one ordered pass
+        flags.add("spatial sort key, see [export] extraction")
+    elif key is not None and relkind in ("r", "m", "p") and not indexed:
+        indexes.append(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{}_{}_idx" '
+            'ON "{}"."{}" ("{}")'.format(table, key, schema, table, key)
+        )
+    connection.rollback()
+    cur.close()
+
+    print(
+        "{:<64}{:>12.0f}{:>12.0f}{:>12.0f}{:>16.0f}  {}".format(
+            dataset.index(**params),
+            rows,
+            first["Total Cost"],
+            deep["Total Cost"],
+            total,
+            ", ".join(sorted(flags)),
+        )
+    )
+    return indexes
+
+
+def explain(cur, sqlquerystring, params=None):
+    cur.execute("EXPLAIN (FORMAT JSON) " + sqlquerystring, params)
+    return cur.fetchone()[0][0]["Plan"]
+
+
+def planFlags(plan):
+    """Sequential scans and sorts anywhere in the plan tree"""
+    flags = set()
+    if plan["Node Type"] == "Seq Scan":
+        flags.add("seq scan {}".format(plan.get("Relation Name", "")))
+    elif plan["Node Type"] in ("Sort", "Incremental Sort"):
+        flags.add("sort on {}".format(", ".join(plan.get("Sort Key", []))))
+    for child in plan.get("Plans", []):
+        flags |= planFlags(child)
+    return flags
+
+
+def deepKey(cur, schema, table, key, relkind, indexed):
+    """
+    A sort key three quarters of the way through the source, from the
+    planner's histogram of the column, in the source itself or in the
+    tables a view reads, or its max() when an index can answer it.
+    None when neither is available.
+    """
+    cur.execute(
+        "SELECT s.histogram_bounds::text::text[] FROM pg_stats AS s "
+        "WHERE s.attname = %(key)s AND s.histogram_bounds IS NOT NULL AND ("
+        "(s.schemaname = %(schema)s AND s.tablename = %(table)s) "
+        "OR (s.schemaname, s.tablename) IN ("
+        "SELECT bn.nspname, b.relname FROM pg_rewrite AS r "
+        "JOIN pg_class AS v ON v.oid = r.ev_class "
+        "JOIN pg_namespace AS vn ON vn.oid = v.relnamespace "
+        "JOIN pg_depend AS d "
+        "ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid "
+        "JOIN pg_class AS b ON b.oid = d.refobjid AND b.oid <> v.oid "
+        "JOIN pg_namespace AS bn ON bn.oid = b.relnamespace "
+        "WHERE vn.nspname = %(schema)s AND v.relname = %(table)s)) "
+        "ORDER BY s.schemaname = %(schema)s AND s.tablename = %(table)s DESC "
+        "LIMIT 1",
+        {"key": key, "schema": schema, "table": table},
+    )
+    row = cur.fetchone()
+    if row is not None and row[0]:
+        bounds = row[0]
+        return bounds[len(bounds) * 3 // 4]
+    if relkind in ("r", "m", "p") and indexed:
+        cur.execute('SELECT max("{}") FROM "{}"."{}"'.format(key, schema, table))
+        return cur.fetchone()[0]
+    return None
+
+
+def sortKeyIndex(cur, schema, table, key):
+    """
+    Kind of the source relation, type of its sort key and whether
+    a btree index starts with that key
+    """
+    cur.execute(
+        "SELECT c.oid, c.relkind FROM pg_class AS c "
+        "JOIN pg_namespace AS n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = %s AND c.relname = %s",
+        (schema, table),
+    )
+    relation = cur.fetchone()
+    if relation is None or key is None:
+        return None, None, False
+    oid, relkind = relation
+    cur.execute(
+        "SELECT format_type(a.atttypid, NULL) FROM pg_attribute AS a "
+        "WHERE a.attrelid = %s AND a.attname = %s",
+        (oid, key),
+    )
+    keyType = cur.fetchone()
+    cur.execute(
+        "SELECT 1 FROM pg_index AS i "
+        "JOIN pg_class AS ic ON ic.oid = i.indexrelid "
+        "JOIN pg_am AS am ON am.oid = ic.relam "
+        "JOIN pg_attribute AS a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0] "
+        "WHERE i.indrelid = %s AND a.attname = %s AND am.amname = 'btree'",
+        (oid, key),
+    )
+    indexed = cur.fetchone() is not None
+    return relkind, keyType[0] if keyType else None, indexed
+
+
+def createIndexes(indexes, pgConnection):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    connection = pgConnection.pgConnection()
+    connection.rollback()
+    connection.autocommit = True
+    cur = connection.cursor()
+    try:
+        for statement in indexes:
+            print(statement)
+            cur.execute(statement)
+    finally:
+        cur.close()
+        connection.autocommit = False
+    return
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="check the query plans of the registered export queries"
+    )
+    parser.add_argument(
+        "--group",
+        action="append",
+        default=[],
+        choices=list(datasets.REGISTRY),
+        help="dataset group to check, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        help="single dataset to check by name, can be repeated",
+    )
+    parser.add_argument(
+        "--eqScenario",
+        action="append",
+        default=[],
+        help="earthquake scenario for the dsra datasets, can be repeated",
+    )
+    parser.add_argument(
+        "--createIndexes",
+        action="store_true",
+        help="build the missing sort key indexes CONCURRENTLY",
+    )
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import json
+
+import utils
+
+
+def dataset(datasetClass=utils.PostGISdataset, idField=None):
+    return datasetClass(None, None, view="test", sqlquerystring="", idField=idField)
+
+
+def documents(dataset, columns, rows):
+    return [json.loads(a["_source"]) for a in dataset.getActions(columns, rows)]
+
+
+def test_null_geometry():
+    docs = documents(
+        dataset(),
+        ["id", "st_asgeojson"],
+        [(1, None), (2, '{"type":"Point","coordinates":[1,2]}')],
+    )
+    assert docs[0]["geometry"] is None
+    assert docs[0]["properties"] == {"id": 1}
+    assert docs[1]["geometry"] == {"type": "Point", "coordinates": [1, 2]}
+
+
+def test_single_property_column():
+    docs = documents(dataset(), ["name", "st_asgeojson"], [("abc", None)])
+    assert docs[0]["properties"] == {"name": "abc"}
+
+
+def test_table_single_column():
+    docs = documents(dataset(utils.PostGISTable), ["id"], [(7,)])
+    assert docs == [{"type": "Feature", "properties": {"id": 7}}]
+
+
+def test_point_null_coordinate():
+    docs = documents(
+        dataset(utils.PostGISPointDataset),
+        ["AssetID", "st_x", "st_y"],
+        [("a", None, 45.0), ("b", -75.5, 45.0)],
+    )
+    assert docs[0]["geometry"] is None
+    assert docs[1]["geometry"]["coordinates"] == [-75.5, 45.0]
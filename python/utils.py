@@ -8,14 +8,99 @@
 #               Joost van Ulden <joost.vanulden@canada.ca>
 # =================================================================
 
+import collections
 import configparser
+import contextlib
+import csv
 import decimal
+import functools
+import hashlib
+import itertools
 import json
+import math
+import operator
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
 from elasticsearch import Elasticsearch, helpers
 
 
+class ConnectionPool:
+    """Process-wide PostGIS connection pool and ElasticSearch client,
+    created on first use and reused by every dataset exported in the
+    run. Close them with close() or by using the class as a context
+    manager around the export
+    """
+
+    _pgPool = None
+    _esClient = None
+    _pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @classmethod
+    def checkProcess(cls):
+        # A forked worker must not share the parent's sockets, so it
+        # drops the inherited pool and client (without closing them)
+        if cls._pid != os.getpid():
+            cls._pgPool = None
+            cls._esClient = None
+            cls._pid = os.getpid()
+
+    @classmethod
+    def pgPool(cls):
+        cls.checkProcess()
+        if cls._pgPool is None:
+            auth = get_config_params("config.ini")
+            cls._pgPool = psycopg2.pool.ThreadedConnectionPool(
+                1,
+                auth.getint("export", "pg_connections", fallback=4),
+                user=auth.get("rds", "postgres_un"),
+                password=auth.get("rds", "postgres_pw"),
+                host=auth.get("rds", "postgres_host"),
+                port=auth.get("rds", "postgres_port"),
+                database=auth.get("rds", "postgres_db"),
+            )
+        return cls._pgPool
+
+    @classmethod
+    def esClient(cls):
+        cls.checkProcess()
+        if cls._esClient is None:
+            auth = get_config_params("config.ini")
+            cls._esClient = Elasticsearch(
+                [auth.get("es", "es_endpoint")],
+                http_auth=(auth.get("es", "es_un"), auth.get("es", "es_pw")),
+                timeout=30,
+                max_retries=10,
+                retry_on_timeout=True,
+                # size of the urllib3 connection pool kept open to each node
+                maxsize=auth.getint("export", "es_pool_size", fallback=10),
+            )
+        return cls._esClient
+
+    @classmethod
+    def close(cls):
+        cls.checkProcess()
+        if cls._pgPool is not None:
+            cls._pgPool.closeall()
+            cls._pgPool = None
+        if cls._esClient is not None:
+            cls._esClient.transport.close()
+            cls._esClient = None
+        return
+
+
 class ESConnection:
     def __init__(self, settings):
         self._settings = settings
@@ -24,19 +109,27 @@ class ESConnection:
     def settings(self):
         return self._settings
 
+    def esClient(self):
+        return ConnectionPool.esClient()
+
     pass
 
 
 class PostGISConnection:
+    """A PostGIS connection borrowed from the process-wide pool,
+    handed back by close() or at the end of a with block
+    """
+
     def __init__(self):
         self._auth = get_config_params("config.ini")
-        self._pgConnection = psycopg2.connect(
-            user=self._auth.get("rds", "postgres_un"),
-            password=self._auth.get("rds", "postgres_pw"),
-            host=self._auth.get("rds", "postgres_host"),
-            port=self._auth.get("rds", "postgres_port"),
-            database=self._auth.get("rds", "postgres_db"),
-        )
+        self._pgConnection = ConnectionPool.pgPool().getconn()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
 
     def auth(self):
         return self._auth
@@ -44,9 +137,60 @@ class PostGISConnection:
     def pgConnection(self):
         return self._pgConnection
 
+    def close(self):
+        if self._pgConnection is not None:
+            ConnectionPool.pgPool().putconn(self._pgConnection)
+            self._pgConnection = None
+        return
+
     pass
 
 
+class PostGISSnapshot:
+    """A read-only REPEATABLE READ transaction kept open so that other
+    connections can import its snapshot and read the same rows. It has
+    its own connection, outside the pool that forked workers drop.
+    """
+
+    def __init__(self):
+        auth = get_config_params("config.ini")
+        self._pgConnection = psycopg2.connect(
+            user=auth.get("rds", "postgres_un"),
+            password=auth.get("rds", "postgres_pw"),
+            host=auth.get("rds", "postgres_host"),
+            port=auth.get("rds", "postgres_port"),
+            database=auth.get("rds", "postgres_db"),
+        )
+        self._pgConnection.set_session(
+            isolation_level=psycopg2.extensions.ISOLATION_LEVEL_REPEATABLE_READ,
+            readonly=True,
+        )
+        cur = self._pgConnection.cursor()
+        cur.execute("SELECT pg_export_snapshot()")
+        self._snapshot = cur.fetchone()[0]
+        cur.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def pgConnection(self):
+        return self._pgConnection
+
+    def snapshot(self):
+        return self._snapshot
+
+    def close(self):
+        if self._pgConnection is not None:
+            self._pgConnection.rollback()
+            self._pgConnection.close()
+            self._pgConnection = None
+        return
+
+
 class PostGISdataset:
     """A class to represent a dataset stored
     in PostGIS with methods to connect to
@@ -57,13 +201,119 @@ class PostGISdataset:
 
     LIMIT = 10000
     OFFSET = 0
+    LASTKEY = None
+    ITERSIZE = 10000
+    # Index settings used while documents are being loaded, replaced
+    # by the requested settings once the load is complete
+    BULKSETTINGS = {
+        "refresh_interval": "-1",
+        "translog.durability": "async",
+        "number_of_replicas": 0,
+    }
+    # Bound concurrent PostGIS queries and ES bulk requests when several
+    # datasets are exported in parallel (see export_scheduler.py)
+    PGSEMAPHORE = contextlib.nullcontext()
+    ESSEMAPHORE = contextlib.nullcontext()
+    # Columns the query adds for the geometry, left out of the properties
+    GEOMETRYCOLUMNS = ("st_asgeojson",)
 
-    def __init__(self, PostGISConnection, ESConnection, view, sqlquerystring):
+    def __init__(
+        self,
+        PostGISConnection,
+        ESConnection,
+        view,
+        sqlquerystring,
+        sortkey=None,
+        idField=None,
+        include=None,
+        exclude=None,
+        displayOnly=None,
+        resume=False,
+        keyRange=None,
+        snapshot=None,
+        index=None,
+        idPrefix="",
+    ):
         self._pgConnection = PostGISConnection
         self._esConnection = ESConnection
         self._view = view
         self._sqlquerystring = sqlquerystring
+        self._sortkey = sortkey
+        self._idField = idField
+        self._idPrefix = idPrefix
+        self._include = include
+        self._exclude = exclude or []
+        self._displayOnly = displayOnly or []
+        self._projection = None
+        self._columnTypes = None
+        self._resume = resume
+        self._resumed = False
+        self._documents = 0
         self._auth = get_config_params("config.ini")
+        extraction = self._auth.get("export", "extraction", fallback="paged")
+        self._stream = extraction == "stream"
+        self._copy = extraction == "copy"
+        assembly = self._auth.get("export", "assembly", fallback="python")
+        self._inDatabase = assembly == "database"
+        self._project = self._auth.getboolean(
+            "export", "project_columns", fallback=True
+        )
+        self._typedMappings = self._auth.getboolean(
+            "export", "typed_mappings", fallback=False
+        )
+        self.ITERSIZE = self._auth.getint("export", "itersize", fallback=self.ITERSIZE)
+        self._bulkLoad = self._auth.getboolean("export", "bulk_load", fallback=False)
+        self._forcemerge = self._auth.getboolean("export", "forcemerge", fallback=False)
+        self._failures = collections.Counter()
+        self._aliasSwap = self._auth.getboolean("export", "alias_swap", fallback=False)
+        self._deleteOldIndex = self._auth.getboolean(
+            "export", "delete_old_index", fallback=True
+        )
+        # Only datasets with an id field, in an index of their own, can be
+        # exported incrementally, the others are still reloaded in full
+        incremental = self._auth.getboolean("export", "incremental", fallback=False)
+        self._incremental = incremental and idField is not None and index is None
+        self._stateTable = self._auth.get(
+            "export", "state_table", fallback="public.es_export_state"
+        )
+        if self._incremental:
+            self._aliasSwap = False
+        self._checkpoints = self._auth.getboolean(
+            "export", "checkpoints", fallback=False
+        )
+        self._checkpointTable = self._auth.get(
+            "export", "checkpoint_table", fallback="public.es_export_checkpoint"
+        )
+        self._staging = self._auth.getboolean("export", "staging", fallback=False)
+        self._stagingSchema = self._auth.get(
+            "export", "staging_schema", fallback="es_staging"
+        )
+        self._stagingSeconds = None
+        self._shardSize = (
+            self._auth.getfloat("export", "shard_size_gb", fallback=0) * 1e9
+        )
+        self._pageSeconds = []
+        # With alias swapping the documents go to a new timestamped index,
+        # and view becomes the alias moved onto it once it is complete
+        self._index = view
+        if self._aliasSwap:
+            self._index = "{}_{}".format(view, time.strftime("%Y%m%d%H%M%S"))
+        # Part of an index set up and finalized by the scheduler: a sort
+        # key range of a partitioned view, (lower, upper], or one scenario
+        # of a combined index, read in the exported snapshot if any
+        self._keyRange = keyRange
+        self._snapshot = snapshot
+        self._managed = index is not None
+        if self._managed:
+            self._index = index
+            self._checkpoints = False
+        if keyRange is not None:
+            self.LASTKEY = keyRange[0]
+        if sortkey is not None and "{where}" not in sqlquerystring:
+            raise ValueError(
+                "sqlquerystring for {} needs a {{where}} placeholder "
+                "to be paged by sortkey".format(view)
+            )
 
     def pgConnection(self):
         return self._pgConnection
@@ -80,146 +330,1268 @@ class PostGISdataset:
     def sqlquerystring(self):
         return self._sqlquerystring
 
-    def getGeoJson(self, sqlquerystring, pgConnection):
+    def sortkey(self):
+        return self._sortkey
+
+    def idField(self):
+        return self._idField
+
+    def incremental(self):
+        return self._incremental
+
+    def checkpoints(self):
+        return self._checkpoints
+
+    def checkpointTable(self):
+        return self._checkpointTable
+
+    def keyRange(self):
+        return self._keyRange
+
+    def managed(self):
+        return self._managed
+
+    def staging(self):
+        """
+        Only whole views read in keyset pages are staged, a single
+        stream or COPY query runs the view plan once anyway
+        """
+        return (
+            self._staging
+            and self.sortkey() is not None
+            and not self.managed()
+            and not (self.stream() or self.copy())
+        )
+
+    def stagingTable(self):
+        """
+        The view name is cut short and made unique with an md5 token:
+        PostgreSQL truncates identifiers to 63 bytes, and views sharing
+        a long prefix would otherwise stage into the same table
+        """
+        token = hashlib.md5(self.view().encode("utf-8")).hexdigest()[:12]
+        table = "{}_{}".format(self.view()[:40], token)
+        for identifier in (self._stagingSchema, table):
+            if len(identifier.encode("utf-8")) > PGIDENTIFIERBYTES:
+                raise ValueError(
+                    "staging identifier {} is longer than {} bytes".format(
+                        identifier, PGIDENTIFIERBYTES
+                    )
+                )
+        return '"{}"."{}"'.format(self._stagingSchema, table)
+
+    def pageSeconds(self):
+        return self._pageSeconds
+
+    def snapshot(self):
+        return self._snapshot
+
+    def stateTable(self):
+        return self._stateTable
+
+    def stream(self):
+        return self._stream
+
+    def copy(self):
+        return self._copy
+
+    def inDatabase(self):
+        return self._inDatabase
+
+    def project(self):
+        return self._project
+
+    def typed(self):
+        return self._typedMappings
+
+    def bulkLoad(self):
+        return self._bulkLoad
+
+    def forcemerge(self):
+        return self._forcemerge
+
+    def failures(self):
+        return self._failures
+
+    def index(self):
+        return self._index
+
+    def aliasSwap(self):
+        return self._aliasSwap
+
+    def deleteOldIndex(self):
+        return self._deleteOldIndex
+
+    def pageQuery(self):
+        """
+        Return the SQL and parameters for the next page.
+        Datasets with a unique sortkey are paged by keyset
+        (WHERE key > last key seen) so every page costs the same;
+        the others fall back to LIMIT/OFFSET paging. Rows with a NULL
+        sort key cannot be reached by keyset and are left out, see
+        warnNullKeys.
+        """
+        if self.sortkey() is None:
+            sqlquerystring = self.sqlquerystring().format(
+                **{"limit": self.LIMIT, "offset": self.OFFSET, "where": ""}
+            )
+            return sqlquerystring, None
+
+        conditions = ['"{}" IS NOT NULL'.format(self.sortkey())]
+        params = {"lastkey": self.LASTKEY}
+        if self.LASTKEY is not None:
+            conditions.append('"{}" > %(lastkey)s'.format(self.sortkey()))
+        if self.keyRange() is not None and self.keyRange()[1] is not None:
+            conditions.append('"{}" <= %(upper)s'.format(self.sortkey()))
+            params["upper"] = self.keyRange()[1]
+        sqlquerystring = self.sqlquerystring().format(
+            **{
+                "limit": self.LIMIT,
+                "offset": 0,
+                "where": "WHERE " + " AND ".join(conditions),
+            }
+        )
+        return sqlquerystring, params
+
+    def rangeQuery(self, pgConnection):
+        """
+        The whole view, or only its key range, as one query with the
+        bounds inlined (COPY TO STDOUT takes no parameters)
+        """
+        where = ""
+        if self.keyRange() is not None:
+            # NULL keys belong to no range, partitionBounds reports them
+            cur = pgConnection.pgConnection().cursor()
+            conditions = ['"{}" IS NOT NULL'.format(self.sortkey())]
+            lower, upper = self.keyRange()
+            if lower is not None:
+                conditions.append(
+                    cur.mogrify('"{}" > %s'.format(self.sortkey()), (lower,)).decode()
+                )
+            if upper is not None:
+                conditions.append(
+                    cur.mogrify('"{}" <= %s'.format(self.sortkey()), (upper,)).decode()
+                )
+            cur.close()
+            where = "WHERE " + " AND ".join(conditions)
+        return self.sqlquerystring().format(
+            **{"limit": "ALL", "offset": 0, "where": where}
+        )
+
+    def partitionBounds(self, pgConnection, partitions):
+        """
+        Split the sort key into ranges holding about the same number of
+        rows, from the last key of each ntile in one ordered pass over
+        the key column. Returns (lower, upper) pairs, lower excluded and
+        upper included, with None leaving the first and last open.
+        Rows with a NULL key are in no range and are reported here.
+        """
+        source = self.sqlquerystring().format(
+            **{"limit": "ALL", "offset": 0, "where": ""}
+        )
         cur = pgConnection.pgConnection().cursor()
-        cur.execute(sqlquerystring)
-        rows = cur.fetchall()
-        if rows:
-            columns = [name[0] for name in cur.description]
-            geomIndex = columns.index("st_asgeojson")
-            feature_collection = {"type": "FeatureCollection", "features": []}
-
-            # Format table into a geojson format for ES/Kibana consumption
-            for row in rows:
-                feature = {
-                    "type": "Feature",
-                    "geometry": json.loads(row[geomIndex]),
-                    "properties": {},
-                }
-                for index, column in enumerate(columns):
-                    if column != "st_asgeojson":
-                        value = row[index]
-                        feature["properties"][column] = value
-                feature_collection["features"].append(feature)
-            geojsonobject = json.dumps(
-                feature_collection, indent=2, default=decimal_default
-            )
-            return geojsonobject
-        else:
-            return None
+        with self.PGSEMAPHORE:
+            cur.execute(
+                'SELECT max(key) FROM (SELECT source."{0}" AS key, '
+                'ntile(%(partitions)s) OVER (ORDER BY source."{0}") AS part '
+                'FROM ({1}) AS source WHERE source."{0}" IS NOT NULL) AS parts '
+                "GROUP BY part ORDER BY part".format(self.sortkey(), source),
+                {"partitions": partitions},
+            )
+            uppers = [row[0] for row in cur.fetchall()][:-1]
+        cur.close()
+        self.warnNullKeys(pgConnection)
+        return list(zip([None] + uppers, uppers + [None]))
 
-    def initializeElasticSearchIndex(self, esConnection, auth, view):
-        es = Elasticsearch(
-            [auth.get("es", "es_endpoint")],
-            http_auth=(auth.get("es", "es_un"), auth.get("es", "es_pw")),
+    def importSnapshot(self, pgConnection):
+        # Must come first in the transaction, before any other query
+        connection = pgConnection.pgConnection()
+        connection.rollback()
+        cur = connection.cursor()
+        with self.PGSEMAPHORE:
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cur.execute("SET TRANSACTION SNAPSHOT %s", (self.snapshot(),))
+        cur.close()
+        return
+
+    def documentQuery(self, sqlquerystring):
+        """
+        Wrap a query so PostgreSQL returns each finished _source as one
+        JSON text column named document, next to the sort and id keys
+        """
+        keys = [key for key in (self.sortkey(), self.idField()) if key is not None]
+        keyColumns = "".join(', source."{}"'.format(key) for key in dict.fromkeys(keys))
+        documentQuery = "SELECT {} AS document{} FROM ({}) AS source".format(
+            self.documentSQL(), keyColumns, sqlquerystring
+        )
+        if self.sortkey() is not None:
+            documentQuery += ' ORDER BY source."{}"'.format(self.sortkey())
+        return documentQuery
+
+    def documentSQL(self):
+        # Same document as getSource, the ST_AsGeoJSON text is spliced in as-is
+        return (
+            '\'{"type":"Feature","geometry":\' '
+            "|| coalesce(source.st_asgeojson, 'null') "
+            "|| ',\"properties\":' "
+            "|| (to_jsonb(source) - 'st_asgeojson')::text || '}'"
+        )
+
+    def extractionQuery(self, sqlquerystring, pgConnection):
+        if self.project():
+            sqlquerystring = self.projectedQuery(sqlquerystring, pgConnection)
+        if self.inDatabase():
+            sqlquerystring = self.documentQuery(sqlquerystring)
+        return sqlquerystring
+
+    def columnTypes(self, pgConnection):
+        """
+        Name, type oid and numeric scale of each column the query
+        returns, read once from a LIMIT 0 run
+        """
+        if self._columnTypes is None:
+            cur = pgConnection.pgConnection().cursor()
+            with self.PGSEMAPHORE:
+                cur.execute(
+                    self.sqlquerystring().format(
+                        **{"limit": 0, "offset": 0, "where": ""}
+                    )
+                )
+            self._columnTypes = [
+                (column.name, column.type_code, column.scale)
+                for column in cur.description
+            ]
+            cur.close()
+        return self._columnTypes
+
+    def typedMappings(self, pgConnection):
+        """
+        Explicit mappings for the document properties, from the
+        PostgreSQL column types: keyword for ids and text, scaled_float
+        for numerics with a declared scale up to 6, float for the other
+        fractional numbers, and index: false for display-only fields
+        """
+        names = None
+        if self.project():
+            names = set(self.projection(pgConnection)[0])
+        ids = {self.sortkey(), self.idField()}
+        fields = {}
+        for name, typeCode, scale in self.columnTypes(pgConnection):
+            if name in self.GEOMETRYCOLUMNS or (
+                names is not None and name not in names
+            ):
+                continue
+            if name in ids:
+                field = {"type": "keyword"}
+            elif typeCode == NUMERICTYPE and scale is not None and 0 < scale <= 6:
+                field = {"type": "scaled_float", "scaling_factor": 10**scale}
+            elif typeCode in FIELDTYPES:
+                field = {"type": FIELDTYPES[typeCode]}
+            else:
+                field = {"type": "keyword", "index": False, "doc_values": False}
+            if name in self._displayOnly:
+                field.update({"index": False, "doc_values": False})
+            fields[name] = field
+        return {"type": {"type": "keyword"}, "properties": {"properties": fields}}
+
+    def projection(self, pgConnection):
+        """
+        Columns kept in the documents, and those dropped: geometry and
+        geography columns (already sent as the GeoJSON geometry),
+        the exclude list, or everything outside the include list.
+        Resolved once from the query's result description, along with
+        the average bytes the dropped columns would add to a _source.
+        """
+        if self._projection is not None:
+            return self._projection
+        cur = pgConnection.pgConnection().cursor()
+        with self.PGSEMAPHORE:
+            cur.execute(
+                "SELECT oid FROM pg_type WHERE typname IN ('geometry', 'geography')"
+            )
+            geometryTypes = {row[0] for row in cur.fetchall()}
+        description = self.columnTypes(pgConnection)
+
+        required = {*self.GEOMETRYCOLUMNS, self.sortkey(), self.idField()}
+        kept, dropped, droppedGeometries = [], [], set()
+        for name, typeCode, scale in description:
+            if name in required:
+                keep = True
+            elif self._include is not None:
+                keep = name in self._include
+            else:
+                keep = typeCode not in geometryTypes and name not in self._exclude
+            (kept if keep else dropped).append(name)
+            if not keep and typeCode in geometryTypes:
+                droppedGeometries.add(name)
+
+        droppedBytes = 0
+        if dropped:
+            # "name": plus the value as it would have been sent, averaged
+            # over a first page. Geometries come back from psycopg2 as hex
+            # EWKB strings, two characters per byte and the quotes.
+            sizes = []
+            for name in dropped:
+                if name in droppedGeometries:
+                    value = '2 * octet_length(ST_AsEWKB(source."{}"::geometry)) + 2'
+                else:
+                    value = 'octet_length(to_json(source."{}")::text)'
+                sizes.append(
+                    "coalesce({}, 4) + {}".format(value.format(name), len(name) + 4)
+                )
+            sizes = " + ".join(sizes)
+            sample = self.sqlquerystring().format(
+                **{"limit": self.LIMIT, "offset": 0, "where": ""}
+            )
+            with self.PGSEMAPHORE:
+                cur.execute(
+                    "SELECT coalesce(avg({}), 0) FROM ({}) AS source".format(
+                        sizes, sample
+                    )
+                )
+                droppedBytes = float(cur.fetchone()[0])
+        cur.close()
+        self._projection = (kept, dropped, droppedBytes)
+        return self._projection
+
+    def projectedQuery(self, sqlquerystring, pgConnection):
+        kept, dropped, droppedBytes = self.projection(pgConnection)
+        if not dropped:
+            return sqlquerystring
+        projectedQuery = "SELECT {} FROM ({}) AS source".format(
+            ", ".join('source."{}"'.format(name) for name in kept), sqlquerystring
+        )
+        if self.sortkey() is not None:
+            projectedQuery += ' ORDER BY source."{}"'.format(self.sortkey())
+        return projectedQuery
+
+    def fetchPage(self, sqlquerystring, pgConnection, params=None):
+        sqlquerystring = self.extractionQuery(sqlquerystring, pgConnection)
+        cur = pgConnection.pgConnection().cursor()
+        with self.PGSEMAPHORE:
+            start = time.perf_counter()
+            cur.execute(sqlquerystring, params)
+            rows = cur.fetchall()
+            self._pageSeconds.append(time.perf_counter() - start)
+        columns = [name[0] for name in cur.description]
+        if rows and self.sortkey() is not None:
+            self.LASTKEY = rows[-1][columns.index(self.sortkey())]
+            if self.LASTKEY is None:
+                # The next page would start over from the first row
+                raise RuntimeError(
+                    "{} page ended on a NULL {}".format(self.view(), self.sortkey())
+                )
+        return columns, rows
+
+    def streamActions(self, sqlquerystring, pgConnection, params=None):
+        """
+        Yield bulk actions from a server-side (named) cursor.
+        Rows are fetched ITERSIZE at a time, so memory use stays flat
+        whatever the size of the view.
+        """
+        sqlquerystring = self.extractionQuery(sqlquerystring, pgConnection)
+        cur = pgConnection.pgConnection().cursor(name="{}_cursor".format(self.view()))
+        cur.itersize = self.ITERSIZE
+        try:
+            with self.PGSEMAPHORE:
+                cur.execute(sqlquerystring, params)
+                rows = iter(cur)
+                first = next(rows, None)
+                if first is None:
+                    return
+                columns = [name[0] for name in cur.description]
+                yield from self.getActions(columns, itertools.chain([first], rows))
+        finally:
+            cur.close()
+
+    def copyActions(self, sqlquerystring, pgConnection):
+        """
+        Yield bulk actions from COPY (query) TO STDOUT in CSV.
+        A thread runs copy_expert into a pipe while the rows are read
+        back ITERSIZE at a time and decoded column by column, numbers
+        parsed with float() or int() instead of a decimal.Decimal per
+        value.
+        """
+        sqlquerystring = self.extractionQuery(sqlquerystring, pgConnection)
+        connection = pgConnection.pgConnection()
+        cur = connection.cursor()
+        # Column types, without running the query
+        cur.execute("SELECT * FROM ({}) AS source LIMIT 0".format(sqlquerystring))
+        types = [column.type_code for column in cur.description]
+
+        readFd, writeFd = os.pipe()
+
+        def copy():
+            with os.fdopen(writeFd, "w", encoding="utf-8") as pipe:
+                with self.PGSEMAPHORE:
+                    cur.copy_expert(
+                        "COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER, "
+                        "NULL '{}')".format(sqlquerystring, COPYNULL),
+                        pipe,
+                    )
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(copy)
+            with os.fdopen(readFd, encoding="utf-8", newline="") as pipe:
+                reader = csv.reader(pipe)
+                columns = next(reader, None)
+                while columns is not None:
+                    batch = list(itertools.islice(reader, self.ITERSIZE))
+                    if not batch:
+                        break
+                    yield from self.getActions(columns, decodeBatch(types, batch))
+            future.result()
+        cur.close()
+        return
+
+    def getActions(self, columns, rows):
+        """
+        Yield one bulk action per row. The _source is JSON text built
+        once per document, with the ST_AsGeoJSON output spliced in as-is,
+        so nothing is parsed or re-encoded on its way to Elasticsearch.
+        """
+        if "document" in columns:
+            yield from self.getDocumentActions(columns, rows)
+            return
+
+        geomIndexes = [i for i, c in enumerate(columns) if c in self.GEOMETRYCOLUMNS]
+        getGeometry = None
+        if geomIndexes:
+            getGeometry = operator.itemgetter(*geomIndexes)
+        propIndexes = [
+            i for i, c in enumerate(columns) if c not in self.GEOMETRYCOLUMNS
+        ]
+        propColumns = [columns[i] for i in propIndexes]
+
+        def getValues(row):
+            # A tuple even with a single property column
+            return tuple(row[i] for i in propIndexes)
+
+        idIndex = None
+        if self.idField() is not None:
+            idIndex = columns.index(self.idField())
+
+        for row in rows:
+            properties = json.dumps(
+                dict(zip(propColumns, getValues(row))),
+                default=decimal_default,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            geometry = getGeometry(row) if getGeometry is not None else None
+            action = {
+                "_index": self.index(),
+                "_source": self.getSource(geometry, properties),
+            }
+            if idIndex is not None:
+                # Indexed, not created: a resent bulk body or a resumed
+                # page overwrites the documents instead of a 409
+                action["_id"] = self._idPrefix + str(row[idIndex])
+                action["_op_type"] = "index"
+            self._documents += 1
+            yield action
+
+    def getDocumentActions(self, columns, rows):
+        # Documents assembled by PostgreSQL go out untouched
+        documentIndex = columns.index("document")
+        idIndex = None
+        if self.idField() is not None:
+            idIndex = columns.index(self.idField())
+        for row in rows:
+            action = {"_index": self.index(), "_source": row[documentIndex]}
+            if idIndex is not None:
+                action["_id"] = self._idPrefix + str(row[idIndex])
+                action["_op_type"] = "index"
+            self._documents += 1
+            yield action
+
+    def getSource(self, geometry, properties):
+        # ST_AsGeoJSON of a NULL geometry is NULL, sent as null
+        if geometry is None:
+            geometry = "null"
+        return '{{"type":"Feature","geometry":{},"properties":{}}}'.format(
+            geometry, properties
         )
+
+    def initializeElasticSearchIndex(self, esConnection, auth, view):
+        es = esConnection.esClient()
         if es.indices.exists(view):
             es.indices.delete(view)
-        settings = esConnection.settings()
+        settings = dict(esConnection.settings())
+        if self._shardSize:
+            settings["settings"] = {
+                **settings.get("settings", {}),
+                "number_of_shards": self.plannedShards(self.pgConnection()),
+            }
+        if self.bulkLoad():
+            settings["settings"] = {
+                **settings.get("settings", {}),
+                **self.BULKSETTINGS,
+            }
+        if "mappings" in settings or self.typed():
+            mappings = settings.get("mappings", {})
+            if self.typed():
+                mappings = mergeMappings(
+                    mappings, {"properties": self.typedMappings(self.pgConnection())}
+                )
+            settings["mappings"] = self.geometryMappings(mappings)
         es.indices.create(index=view, body=settings, request_timeout=90)
         return
 
-    def populateElasticSearchIndex(self, esConnection, geojsonobject, auth, view):
-        d = json.loads(geojsonobject)
-        es = Elasticsearch(
-            [auth.get("es", "es_endpoint")],
-            http_auth=(auth.get("es", "es_un"), auth.get("es", "es_pw")),
-            timeout=30,
-            max_retries=10,
-            retry_on_timeout=True,
+    def geometryMappings(self, mappings):
+        return mappings
+
+    def plannedShards(self, pgConnection):
+        """
+        Primary shards for the index: the documents the planner expects
+        times their average JSON size over a first page, split into
+        shards of at most shard_size_gb
+        """
+        source = self.sqlquerystring().format(
+            **{"limit": "ALL", "offset": 0, "where": ""}
+        )
+        sample = self.sqlquerystring().format(
+            **{"limit": self.LIMIT, "offset": 0, "where": ""}
+        )
+        cur = pgConnection.pgConnection().cursor()
+        with self.PGSEMAPHORE:
+            cur.execute("EXPLAIN (FORMAT JSON) " + source)
+            rows = cur.fetchone()[0][0]["Plan"]["Plan Rows"]
+            cur.execute(
+                "SELECT coalesce(avg(octet_length(to_json(source)::text)), 0) "
+                "FROM ({}) AS source".format(sample)
+            )
+            documentBytes = float(cur.fetchone()[0])
+        cur.close()
+        shards = max(1, math.ceil(rows * documentBytes / self._shardSize))
+        print(
+            "{}: about {:.0f} documents of {:.0f} bytes, {} shards".format(
+                self.index(), rows, documentBytes, shards
+            )
+        )
+        return shards
+
+    def finalizeElasticSearchIndex(self, esConnection, auth, view):
+        """
+        Put back the requested refresh interval and translog durability
+        (None restores the Elasticsearch default), refresh once,
+        optionally merge down to one segment, then add the replicas
+        so they copy the merged segments rather than the load
+        """
+        if not self.bulkLoad():
+            return
+        es = esConnection.esClient()
+        requested = esConnection.settings().get("settings", {})
+        es.indices.put_settings(
+            index=view,
+            body={
+                "refresh_interval": requested.get("refresh_interval"),
+                "translog.durability": requested.get("translog.durability"),
+            },
+        )
+        es.indices.refresh(index=view, request_timeout=600)
+        if self.forcemerge():
+            es.indices.forcemerge(index=view, max_num_segments=1, request_timeout=3600)
+        es.indices.put_settings(
+            index=view,
+            body={"number_of_replicas": requested.get("number_of_replicas")},
         )
-        helpers.bulk(es, gendata(d, view), raise_on_error=False)
+        return
+
+    def populateElasticSearchIndex(self, esConnection, actions, auth, view):
+        """
+        Index the actions with bulk_threads streaming_bulk loops pulling
+        from the same generator. Chunks rejected with 429 are retried
+        with exponential backoff; documents that still fail are counted
+        per index in failures() instead of being dropped silently.
+        """
+        es = esConnection.esClient()
+        threads = auth.getint("export", "bulk_threads", fallback=1)
+        options = {
+            "chunk_size": auth.getint("export", "chunk_size", fallback=500),
+            "max_chunk_bytes": auth.getint(
+                "export", "max_chunk_bytes", fallback=100 * 1024 * 1024
+            ),
+            "max_retries": auth.getint("export", "bulk_retries", fallback=5),
+            "initial_backoff": auth.getint("export", "initial_backoff", fallback=2),
+            "raise_on_error": False,
+            "raise_on_exception": False,
+            "yield_ok": False,
+        }
+        lock = threading.Lock()
+        actions = iter(actions)
+
+        def indexActions():
+            # The actions generator is shared, one thread advances it at a time
+            def nextActions():
+                while True:
+                    with lock:
+                        action = next(actions, None)
+                    if action is None:
+                        return
+                    yield action
+
+            failures = collections.Counter()
+            for ok, item in helpers.streaming_bulk(es, nextActions(), **options):
+                opType, result = next(iter(item.items()))
+                if opType == "delete" and result.get("status") == 404:
+                    # Already gone from the index, nothing was lost
+                    continue
+                failures[result.get("_index", view)] += 1
+            return failures
+
+        with self.ESSEMAPHORE:
+            if threads <= 1:
+                self._failures.update(indexActions())
+            else:
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    futures = [executor.submit(indexActions) for _ in range(threads)]
+                    for future in futures:
+                        self._failures.update(future.result())
         return
 
     def postgis2es(self):
-        self.initializeElasticSearchIndex(self.esConnection(), self.auth(), self.view())
-        sqlquerystring = self.sqlquerystring().format(
-            **{"limit": self.LIMIT, "offset": self.OFFSET}
-        )
-        geojsonobject = self.getGeoJson(sqlquerystring, self.pgConnection())
-        while geojsonobject is not None:
+        if self.incremental():
+            self.incrementalExport(self.esConnection(), self.pgConnection())
+            self.reportFailures()
+            self.reportProjection()
+            return
+        if self.managed():
+            # The index is set up and finalized by the scheduler, around
+            # all of its parts (see export_scheduler.py)
+            if self.snapshot() is not None:
+                self.importSnapshot(self.pgConnection())
+            self.exportRows()
+            self.reportFailures()
+            self.reportProjection()
+            self.reportPages()
+            return
+
+        if self.staging():
+            self.stage(self.pgConnection())
+        try:
+            self.exportView()
+        finally:
+            if self.staging():
+                self.dropStaging(self.pgConnection())
+        self.reportPages()
+        return
+
+    def exportView(self):
+        if self.checkpoints():
+            self.createCheckpointTable(self.pgConnection())
+        if self._resume and self.checkpoints():
+            self._resumed = self.loadCheckpoint(
+                self.esConnection(), self.pgConnection()
+            )
+        if not self._resumed:
+            self.initializeElasticSearchIndex(
+                self.esConnection(), self.auth(), self.index()
+            )
+        self.exportRows()
+
+        self.finalizeElasticSearchIndex(self.esConnection(), self.auth(), self.index())
+        self.reportFailures()
+        self.reportProjection()
+        if self.aliasSwap():
+            self.swapAlias(self.esConnection(), self.pgConnection())
+        if self.checkpoints():
+            self.clearCheckpoint(self.pgConnection())
+        return
 
+    def exportRows(self):
+        # A resumed export carries on page by page from its checkpoint
+        if (self.stream() or self.copy()) and not self._resumed:
+            # Single query over the whole view, rows flow straight to ES
+            sqlquerystring = self.rangeQuery(self.pgConnection())
             print(sqlquerystring)
+            if self.copy():
+                actions = self.copyActions(sqlquerystring, self.pgConnection())
+            else:
+                actions = self.streamActions(sqlquerystring, self.pgConnection())
             self.populateElasticSearchIndex(
-                self.esConnection(), geojsonobject, self.auth(), self.view()
+                self.esConnection(), actions, self.auth(), self.index()
             )
-            self.OFFSET += self.LIMIT
+        else:
+            # The key ranges of a partitioned view were checked for NULL
+            # keys when they were split, see partitionBounds
+            if self.sortkey() is not None and not self._resumed:
+                if self.keyRange() is None:
+                    self.warnNullKeys(self.pgConnection())
+            sqlquerystring, params = self.pageQuery()
+            columns, rows = self.fetchPage(sqlquerystring, self.pgConnection(), params)
+            while rows:
 
-            sqlquerystring = self.sqlquerystring().format(
-                **{"limit": self.LIMIT, "offset": self.OFFSET}
+                print(
+                    "{} rows in {:.3f}s: {}".format(
+                        len(rows), self.pageSeconds()[-1], sqlquerystring
+                    )
+                )
+                self.populateElasticSearchIndex(
+                    self.esConnection(),
+                    self.getActions(columns, rows),
+                    self.auth(),
+                    self.index(),
+                )
+                self.OFFSET += self.LIMIT
+                if self.checkpoints():
+                    self.saveCheckpoint(self.pgConnection())
+
+                sqlquerystring, params = self.pageQuery()
+                columns, rows = self.fetchPage(
+                    sqlquerystring, self.pgConnection(), params
+                )
+        return
+
+    def warnNullKeys(self, pgConnection):
+        """
+        Count the rows whose sort key is NULL, which keyset paging
+        leaves out of the index, and warn about them
+        """
+        source = self.sqlquerystring().format(
+            **{"limit": "ALL", "offset": 0, "where": ""}
+        )
+        cur = pgConnection.pgConnection().cursor()
+        with self.PGSEMAPHORE:
+            cur.execute(
+                'SELECT count(*) FROM ({}) AS source WHERE source."{}" IS NULL'.format(
+                    source, self.sortkey()
+                )
             )
-            geojsonobject = self.getGeoJson(sqlquerystring, self.pgConnection())
+            nulls = cur.fetchone()[0]
+        cur.close()
+        if nulls:
+            print(
+                "WARNING: {} rows of {} have a NULL {} and are not exported".format(
+                    nulls, self.view(), self.sortkey()
+                )
+            )
+        return nulls
 
+    def stage(self, pgConnection):
+        """
+        Run the view once into an UNLOGGED table of the staging schema,
+        GeoJSON included, with a btree index on the sort key and fresh
+        statistics, and page through that table instead of the view
+        """
+        source = self.sqlquerystring().format(
+            **{"limit": "ALL", "offset": 0, "where": ""}
+        )
+        connection = pgConnection.pgConnection()
+        cur = connection.cursor()
+        start = time.perf_counter()
+        with self.PGSEMAPHORE:
+            cur.execute('CREATE SCHEMA IF NOT EXISTS "{}"'.format(self._stagingSchema))
+            cur.execute("DROP TABLE IF EXISTS {}".format(self.stagingTable()))
+            cur.execute(
+                "CREATE UNLOGGED TABLE {} AS {}".format(self.stagingTable(), source)
+            )
+            cur.execute(
+                'CREATE INDEX ON {} ("{}")'.format(self.stagingTable(), self.sortkey())
+            )
+            cur.execute("ANALYZE {}".format(self.stagingTable()))
+            connection.commit()
+        cur.close()
+        self._stagingSeconds = time.perf_counter() - start
+        print("Staged {} in {:.1f}s".format(self.stagingTable(), self._stagingSeconds))
+        self._sqlquerystring = (
+            'SELECT * FROM {} {{where}} ORDER BY "{}" '
+            "LIMIT {{limit}} OFFSET {{offset}}".format(
+                self.stagingTable(), self.sortkey()
+            )
+        )
         return
 
+    def dropStaging(self, pgConnection):
+        connection = pgConnection.pgConnection()
+        connection.rollback()
+        cur = connection.cursor()
+        with self.PGSEMAPHORE:
+            cur.execute("DROP TABLE IF EXISTS {}".format(self.stagingTable()))
+            connection.commit()
+        cur.close()
+        return
 
-class PostGISPointDataset(PostGISdataset):
-    def getGeoJson(self, sqlquerystring, pgConnection):
+    def reportPages(self):
+        if not self.pageSeconds():
+            return
+        seconds = self.pageSeconds()
+        report = "{}: {} page queries, {:.0f} ms average, {:.0f} ms slowest".format(
+            self.index(),
+            len(seconds),
+            1000 * sum(seconds) / len(seconds),
+            1000 * max(seconds),
+        )
+        if self._stagingSeconds is not None:
+            report += ", after {:.1f}s of staging".format(self._stagingSeconds)
+        print(report)
+        return
+
+    def createCheckpointTable(self, pgConnection):
+        connection = pgConnection.pgConnection()
+        cur = connection.cursor()
+        with self.PGSEMAPHORE:
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS {} ("
+                "view text PRIMARY KEY, es_index text, lastkey text, "
+                "documents bigint, updated timestamptz)".format(self.checkpointTable())
+            )
+            connection.commit()
+        cur.close()
+        return
+
+    def saveCheckpoint(self, pgConnection):
+        """
+        Record the last sort key and document count once a page has
+        been acknowledged by Elasticsearch
+        """
+        connection = pgConnection.pgConnection()
+        cur = connection.cursor()
+        lastkey = None if self.LASTKEY is None else str(self.LASTKEY)
+        with self.PGSEMAPHORE:
+            cur.execute(
+                "INSERT INTO {} (view, es_index, lastkey, documents, updated) "
+                "VALUES (%(view)s, %(index)s, %(lastkey)s, %(documents)s, now()) "
+                "ON CONFLICT (view) DO UPDATE SET es_index = EXCLUDED.es_index, "
+                "lastkey = EXCLUDED.lastkey, documents = EXCLUDED.documents, "
+                "updated = EXCLUDED.updated".format(self.checkpointTable()),
+                {
+                    "view": self.view(),
+                    "index": self.index(),
+                    "lastkey": lastkey,
+                    "documents": self._documents,
+                },
+            )
+            connection.commit()
+        cur.close()
+        return
+
+    def loadCheckpoint(self, esConnection, pgConnection):
+        """
+        Pick up where the last run of this view stopped, in the index
+        it was writing to. Returns False when there is nothing to
+        resume, and the export starts from scratch.
+        """
         cur = pgConnection.pgConnection().cursor()
-        cur.execute(sqlquerystring)
-        rows = cur.fetchall()
-        if rows:
-            columns = [name[0] for name in cur.description]
-            geomIndex = columns.index("st_asgeojson")
-            feature_collection = {"type": "FeatureCollection", "features": []}
-
-            # Format table into a geojson format for ES/Kibana consumption
-            for row in rows:
-                coordinates = json.loads(row[geomIndex])["coordinates"]
-                feature = {
-                    "type": "Feature",
-                    "geometry": json.loads(row[geomIndex]),
-                    "coordinates": coordinates,
-                    "properties": {},
-                }
-                for index, column in enumerate(columns):
-                    if column != "st_asgeojson":
-                        value = row[index]
-                        feature["properties"][column] = value
-                feature_collection["features"].append(feature)
-            geojsonobject = json.dumps(
-                feature_collection, indent=2, default=decimal_default
-            )
-            return geojsonobject
+        with self.PGSEMAPHORE:
+            cur.execute(
+                "SELECT es_index, lastkey, documents FROM {} "
+                "WHERE view = %(view)s".format(self.checkpointTable()),
+                {"view": self.view()},
+            )
+            checkpoint = cur.fetchone()
+        cur.close()
+        if checkpoint is None:
+            return False
+        index, lastkey, documents = checkpoint
+        if not esConnection.esClient().indices.exists(index=index):
+            return False
+        self._index = index
+        self._documents = documents
+        if self.sortkey() is not None:
+            self.LASTKEY = lastkey
         else:
-            return None
+            self.OFFSET = documents
+        print("Resuming {} after {} documents".format(index, documents))
+        return True
 
+    def clearCheckpoint(self, pgConnection):
+        connection = pgConnection.pgConnection()
+        cur = connection.cursor()
+        with self.PGSEMAPHORE:
+            cur.execute(
+                "DELETE FROM {} WHERE view = %(view)s".format(self.checkpointTable()),
+                {"view": self.view()},
+            )
+            connection.commit()
+        cur.close()
+        return
 
-class PostGISTable(PostGISdataset):
-    def getGeoJson(self, sqlquerystring, pgConnection):
+    def incrementalExport(self, esConnection, pgConnection):
+        """
+        Send only what changed since the last run. An md5 of every
+        source row is compared with the hashes stored in the state
+        table: new or changed rows are re-indexed under their id,
+        ids no longer in the view are deleted. The state table is
+        only updated once every document has been accepted.
+        """
+        es = esConnection.esClient()
+        connection = pgConnection.pgConnection()
+        cur = connection.cursor()
+        try:
+            params = {"index": self.index()}
+            with self.PGSEMAPHORE:
+                cur.execute(
+                    "CREATE TABLE IF NOT EXISTS {} ("
+                    "es_index text, id text, hash text, "
+                    "PRIMARY KEY (es_index, id))".format(self.stateTable())
+                )
+                connection.commit()
+
+            created = not es.indices.exists(index=self.index())
+            if created:
+                # Nothing indexed yet, so every row counts as new
+                with self.PGSEMAPHORE:
+                    cur.execute(
+                        "DELETE FROM {} WHERE es_index = %(index)s".format(
+                            self.stateTable()
+                        ),
+                        params,
+                    )
+                    connection.commit()
+                self.initializeElasticSearchIndex(
+                    esConnection, self.auth(), self.index()
+                )
+
+            source = self.sqlquerystring().format(
+                **{"limit": "ALL", "offset": 0, "where": ""}
+            )
+            with self.PGSEMAPHORE:
+                cur.execute(
+                    "CREATE TEMP TABLE export_hashes ON COMMIT DROP AS "
+                    'SELECT source."{}"::text AS id, md5(source::text) AS hash '
+                    "FROM ({}) AS source".format(self.idField(), source)
+                )
+                cur.execute(
+                    "SELECT id FROM export_hashes GROUP BY id HAVING count(*) > 1 "
+                    "LIMIT 5"
+                )
+                duplicates = [row[0] for row in cur.fetchall()]
+            if duplicates:
+                # Their documents would overwrite each other in the index
+                connection.rollback()
+                raise ValueError(
+                    "{} is not unique in {}: {}".format(
+                        self.idField(), self.view(), ", ".join(duplicates)
+                    )
+                )
+            with self.PGSEMAPHORE:
+                cur.execute(
+                    "CREATE TEMP TABLE export_changes ON COMMIT DROP AS "
+                    "SELECT latest.id, latest.hash FROM export_hashes AS latest "
+                    "LEFT JOIN {} AS state "
+                    "ON state.es_index = %(index)s AND state.id = latest.id "
+                    "WHERE state.hash IS DISTINCT FROM latest.hash".format(
+                        self.stateTable()
+                    ),
+                    params,
+                )
+                cur.execute(
+                    "SELECT state.id FROM {} AS state "
+                    "WHERE state.es_index = %(index)s AND NOT EXISTS "
+                    "(SELECT 1 FROM export_hashes AS latest "
+                    "WHERE latest.id = state.id)".format(self.stateTable()),
+                    params,
+                )
+                deleted = [row[0] for row in cur.fetchall()]
+                cur.execute("SELECT count(*) FROM export_changes")
+                changed = cur.fetchone()[0]
+            print(
+                "{}: {} new or changed, {} deleted".format(
+                    self.index(), changed, len(deleted)
+                )
+            )
+
+            changes = (
+                "SELECT source.* FROM ({}) AS source "
+                "JOIN export_changes AS changes "
+                'ON changes.id = source."{}"::text'.format(source, self.idField())
+            )
+            actions = itertools.chain(
+                self.streamActions(changes, pgConnection),
+                (
+                    {"_op_type": "delete", "_index": self.index(), "_id": key}
+                    for key in deleted
+                ),
+            )
+            self.populateElasticSearchIndex(
+                esConnection, actions, self.auth(), self.index()
+            )
+            if created:
+                self.finalizeElasticSearchIndex(esConnection, self.auth(), self.index())
+
+            if sum(self.failures().values()):
+                # Keep the previous state, failed rows are sent again next run
+                connection.rollback()
+                return
+            with self.PGSEMAPHORE:
+                cur.execute(
+                    "DELETE FROM {} AS state WHERE state.es_index = %(index)s "
+                    "AND NOT EXISTS (SELECT 1 FROM export_hashes AS latest "
+                    "WHERE latest.id = state.id)".format(self.stateTable()),
+                    params,
+                )
+                cur.execute(
+                    "INSERT INTO {} (es_index, id, hash) "
+                    "SELECT %(index)s, id, hash FROM export_changes "
+                    "ON CONFLICT (es_index, id) "
+                    "DO UPDATE SET hash = EXCLUDED.hash".format(self.stateTable()),
+                    params,
+                )
+                connection.commit()
+        finally:
+            cur.close()
+        return
+
+    def reportFailures(self):
+        for index, count in self.failures().items():
+            print("{} documents failed to index into {}".format(count, index))
+        return
+
+    def reportProjection(self):
+        if self._projection is not None and self._projection[1]:
+            kept, dropped, droppedBytes = self._projection
+            print(
+                "{}: dropped {}, about {:.1f} MB of _source saved "
+                "({:.0f} bytes x {} documents)".format(
+                    self.index(),
+                    ", ".join(dropped),
+                    droppedBytes * self._documents / 1e6,
+                    droppedBytes,
+                    self._documents,
+                )
+            )
+        return
+
+    def sourceCount(self, pgConnection):
+        sqlquerystring = self.sqlquerystring().format(
+            **{"limit": "ALL", "offset": 0, "where": ""}
+        )
         cur = pgConnection.pgConnection().cursor()
-        cur.execute(sqlquerystring)
-        rows = cur.fetchall()
-        if rows:
-            columns = [name[0] for name in cur.description]
-            # geomIndex = columns.index('st_asgeojson')
-            feature_collection = {"type": "FeatureCollection", "features": []}
-
-            # Format table into a geojson format for ES/Kibana consumption
-            for row in rows:
-                # coordinates = json.loads(row[geomIndex])['coordinates']
-                feature = {
-                    "type": "Feature",
-                    # 'geometry': json.loads(row[geomIndex]),
-                    # 'coordinates': coordinates,
-                    "properties": {},
+        with self.PGSEMAPHORE:
+            cur.execute("SELECT count(*) FROM ({}) AS source".format(sqlquerystring))
+            count = cur.fetchone()[0]
+        cur.close()
+        return count
+
+    def swapAlias(self, esConnection, pgConnection):
+        """
+        Point the view name (the alias clients query) at the freshly
+        loaded index in one atomic _aliases call, once its document
+        count matches the source view. Indexes previously behind the
+        alias are deleted afterwards when delete_old_index is set.
+        """
+        es = esConnection.esClient()
+        es.indices.refresh(index=self.index(), request_timeout=600)
+        loaded = es.count(index=self.index())["count"]
+        expected = self.sourceCount(pgConnection)
+        if loaded != expected:
+            raise RuntimeError(
+                "{} holds {} documents, {} expected; {} left unchanged".format(
+                    self.index(), loaded, expected, self.view()
+                )
+            )
+
+        actions = [{"add": {"index": self.index(), "alias": self.view()}}]
+        previous = []
+        if es.indices.exists_alias(name=self.view()):
+            previous = list(es.indices.get_alias(name=self.view()))
+        for index in previous:
+            actions.append({"remove": {"index": index, "alias": self.view()}})
+        if not previous and es.indices.exists(index=self.view()):
+            # Index loaded before alias swapping, replaced in the same call
+            actions.append({"remove_index": {"index": self.view()}})
+        es.indices.update_aliases(body={"actions": actions})
+        print("{} now serves {}".format(self.view(), self.index()))
+
+        if self.deleteOldIndex():
+            for index in previous:
+                es.indices.delete(index=index)
+        return
+
+
+class PostGISPointDataset(PostGISdataset):
+    """
+    Point layers read as ST_X/ST_Y numbers, so no GeoJSON is produced
+    or parsed per row. The coordinates are indexed as a geo_point; the
+    GeoJSON geometry is rebuilt from them as [export] point_geometry
+    asks: shape (indexed as a geo_shape), source (kept in _source but
+    not indexed) or none (left out of the documents)
+    """
+
+    GEOMETRYCOLUMNS = ("st_x", "st_y")
+
+    def __init__(self, *args, pointGeometry=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # shape by default: pygeoapi filters bbox with geo_shape on geometry
+        self._pointGeometry = pointGeometry or self.auth().get(
+            "export", "point_geometry", fallback="shape"
+        )
+
+    def pointGeometry(self):
+        return self._pointGeometry
+
+    def geometryMappings(self, mappings):
+        properties = dict(mappings.get("properties", {}))
+        properties["coordinates"] = {"type": "geo_point"}
+        if self.pointGeometry() == "source":
+            properties["geometry"] = {"type": "object", "enabled": False}
+        elif self.pointGeometry() == "none":
+            properties.pop("geometry", None)
+        return {**mappings, "properties": properties}
+
+    def getSource(self, geometry, properties):
+        x, y = geometry
+        if x is None or y is None:
+            return '{{"type":"Feature","geometry":null,"properties":{}}}'.format(
+                properties
+            )
+        coordinates = "[{},{}]".format(x, y)
+        if self.pointGeometry() == "none":
+            return '{{"type":"Feature","coordinates":{},"properties":{}}}'.format(
+                coordinates, properties
+            )
+        return (
+            '{{"type":"Feature","geometry":{{"type":"Point","coordinates":{0}}},'
+            '"coordinates":{0},"properties":{1}}}'.format(coordinates, properties)
+        )
+
+    def documentSQL(self):
+        # Same documents as getSource, a NULL coordinate gives a null
+        # geometry rather than a NULL document
+        coordinates = "'[' || source.st_x || ',' || source.st_y || ']'"
+        properties = "(to_jsonb(source) - 'st_x' - 'st_y')::text || '}'"
+        geometry = ""
+        if self.pointGeometry() != "none":
+            geometry = (
+                '\'"geometry":{"type":"Point","coordinates":\' || '
+                + coordinates
+                + " || '},' || "
+            )
+        return (
+            "CASE WHEN source.st_x IS NULL OR source.st_y IS NULL THEN "
+            '\'{"type":"Feature","geometry":null,"properties":\' || '
+            + properties
+            + " ELSE "
+            '\'{"type":"Feature",\' || '
+            + geometry
+            + "'\"coordinates\":' || "
+            + coordinates
+            + " || ',\"properties\":' || "
+            + properties
+            + " END"
+        )
+
+
+class PostGISTable(PostGISdataset):
+    def getSource(self, geometry, properties):
+        return '{{"type":"Feature","properties":{}}}'.format(properties)
+
+    def documentSQL(self):
+        return '\'{"type":"Feature","properties":\' || to_jsonb(source)::text || \'}\''
+
+
+# Longest identifier PostgreSQL keeps, longer names are truncated
+PGIDENTIFIERBYTES = 63
+
+# Elasticsearch field type for each PostgreSQL type oid; numerics with a
+# declared scale become scaled_float, see PostGISdataset.typedMappings
+NUMERICTYPE = 1700
+FIELDTYPES = {
+    16: "boolean",
+    20: "long",
+    21: "short",
+    23: "integer",
+    700: "float",
+    701: "float",
+    1700: "float",
+    19: "keyword",
+    25: "keyword",
+    1042: "keyword",
+    1043: "keyword",
+    1082: "date",
+    1114: "date",
+    1184: "date",
+}
+
+
+def putIndexTemplate(es, auth):
+    """
+    Shared template for every opendrr_* index, part of [export]
+    typed_mappings: base settings, strings mapped as keyword only,
+    fractional numbers as float and, with dynamic_strict, unmapped
+    fields rejected. Without typed_mappings any template left by an
+    earlier run is removed, and indexes get the default dynamic mappings.
+    """
+    if not auth.getboolean("export", "typed_mappings", fallback=False):
+        if auth.getboolean("export", "dynamic_strict", fallback=False):
+            print("dynamic_strict ignored, it needs typed_mappings")
+        if es.indices.exists_index_template(name="opendrr"):
+            es.indices.delete_index_template(name="opendrr")
+        return
+    mappings = {
+        "dynamic_templates": [
+            {
+                "strings": {
+                    "match_mapping_type": "string",
+                    "mapping": {"type": "keyword"},
                 }
-                for index, column in enumerate(columns):
-                    if column != "st_asgeojson":
-                        value = row[index]
-                        feature["properties"][column] = value
-                feature_collection["features"].append(feature)
-            geojsonobject = json.dumps(
-                feature_collection, indent=2, default=decimal_default
-            )
-            return geojsonobject
+            },
+            {
+                "numbers": {
+                    "match_mapping_type": "double",
+                    "mapping": {"type": "float"},
+                }
+            },
+        ],
+        "properties": {
+            "type": {"type": "keyword"},
+            "geometry": {"type": "geo_shape"},
+        },
+    }
+    if auth.getboolean("export", "dynamic_strict", fallback=False):
+        mappings["dynamic"] = "strict"
+    es.indices.put_index_template(
+        name="opendrr",
+        body={
+            "index_patterns": ["opendrr_*"],
+            "priority": 1,
+            "template": {
+                "settings": {"number_of_shards": 1, "number_of_replicas": 0},
+                "mappings": mappings,
+            },
+        },
+    )
+    return
+
+
+# PostgreSQL type oids decoded in bulk from COPY CSV output
+FLOATTYPES = {700, 701, 1700}  # float4, float8, numeric
+INTTYPES = {20, 21, 23}  # int8, int2, int4
+BOOLTYPE = 16
+# NULL marker of the COPY output. The default (unquoted \N) cannot be
+# told apart from a text value \N once csv.reader has dropped the quotes,
+# so a control character no real value is expected to consist of is used
+COPYNULL = "\x1a"
+
+
+def decodeBatch(types, batch):
+    """
+    Turn a batch of COPY CSV rows (lists of strings) into row tuples,
+    with numbers and booleans decoded one whole column at a time
+    """
+    decoded = []
+    for typeCode, values in zip(types, zip(*batch)):
+        if typeCode in FLOATTYPES:
+            decode = float
+        elif typeCode in INTTYPES:
+            decode = int
+        elif typeCode == BOOLTYPE:
+            decode = "t".__eq__
         else:
-            return None
+            decode = str
+        decoded.append([None if v == COPYNULL else decode(v) for v in values])
+    return list(zip(*decoded))
 
 
-def gendata(data, view):
-    for item in data["features"]:
-        yield {"_index": view, "_source": item}
+def mergeMappings(mappings, extra):
+    """Mappings with extra merged in, nested objects merged key by key"""
+    merged = dict(mappings)
+    for key, value in extra.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = mergeMappings(merged[key], value)
+        merged[key] = value
+    return merged
 
 
 # Function to handle decimal encoder error
@@ -229,9 +1601,11 @@ def decimal_default(obj):
     raise TypeError
 
 
+@functools.lru_cache(maxsize=None)
 def get_config_params(args):
     """
-    Parse Input/Output columns from supplied *.ini file
+    Parse Input/Output columns from supplied *.ini file,
+    once per file for the life of the process
     """
     configParseObj = configparser.ConfigParser()
     configParseObj.read(args)